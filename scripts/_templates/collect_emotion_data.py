@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Emotion Data Collection Pipeline
+Collects and preprocesses emotion training data from multiple sources
+"""
+
+import os
+import json
+import librosa
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import requests
+import zipfile
+
+class EmotionDataCollector:
+    def __init__(self, output_dir):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        
+    def download_iemocap_dataset(self):
+        """Download IEMOCAP dataset for emotion training"""
+        print("Downloading IEMOCAP dataset...")
+        
+        # IEMOCAP download URLs (simplified for example)
+        iemocap_urls = {
+            "audio": "https://datasets.server.com/iemocap/audio.zip",
+            "labels": "https://datasets.server.com/iemocap/labels.zip"
+        }
+        
+        for name, url in iemocap_urls.items():
+            response = requests.get(url, stream=True)
+            file_path = self.output_dir / f"{name}.zip"
+            
+            with open(file_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=8192):
+                    f.write(chunk)
+            
+            # Extract
+            with zipfile.ZipFile(file_path, 'r') as zip_ref:
+                zip_ref.extractall(self.output_dir / name.replace('.zip', ''))
+            
+            print(f"Downloaded and extracted {name}")
+    
+    def preprocess_audio_files(self, audio_dir, labels_df):
+        """Preprocess audio files for training"""
+        processed_data = []
+        
+        for idx, row in labels_df.iterrows():
+            audio_path = audio_dir / row['filename']
+            
+            if audio_path.exists():
+                # Load audio
+                y, sr = librosa.load(str(audio_path), sr=16000)
+                
+                # Extract features
+                mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
+                chroma = librosa.feature.chroma(y=y, sr=sr)
+                spectral_contrast = librosa.feature.spectral_contrast(y=y, sr=sr)
+                tonnetz = librosa.feature.tonnetz(y=y, sr=sr)
+                
+                # Combine features
+                features = np.hstack([
+                    np.mean(mfccs, axis=1),
+                    np.mean(chroma, axis=1),
+                    np.mean(spectral_contrast, axis=1),
+                    np.mean(tonnetz, axis=1)
+                ])
+                
+                processed_data.append({
+                    'features': features.tolist(),
+                    'emotion': row['emotion'],
+                    'intensity': row['intensity'],
+                    'filename': row['filename']
+                })
+        
+        return processed_data
+    
+    def create_training_dataset(self, processed_data, output_path):
+        """Create training dataset in ML-ready format"""
+        df = pd.DataFrame(processed_data)
+        
+        # Map emotions to numerical labels
+        emotion_map = {
+            'happy': 0, 'sad': 1, 'angry': 2, 'fear': 3,
+            'disgust': 4, 'surprise': 5, 'neutral': 6
+        }
+        df['label'] = df['emotion'].map(emotion_map)
+        
+        # Save processed dataset
+        df.to_json(output_path, orient='records', indent=2)
+        print(f"Saved training dataset to {output_path}")
+
+if __name__ == "__main__":
+    collector = EmotionDataCollector("data/processed/emotions")
+    
+    # Download datasets
+    collector.download_iemocap_dataset()
+    
+    # Process data
+    # (Implementation would load actual data and process it)
+    print("Data collection pipeline completed")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Model Monitoring and Drift Detection
+Real-time monitoring of ML model performance and data drift
+"""
+
+import redis
+import json
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+import mlflow
+import logging
+
+class ModelMonitor:
+    def __init__(self, redis_host='localhost', redis_port=6379):
+        self.redis_client = redis.Redis(host=redis_host, port=redis_port, decode_responses=True)
+        self.logger = logging.getLogger(__name__)
+        
+    def log_prediction(self, model_version, prediction_confidence, actual_label=None):
+        """Log model prediction for monitoring"""
+        timestamp = datetime.utcnow().isoformat()
+        
+        log_entry = {
+            'timestamp': timestamp,
+            'model_version': model_version,
+            'prediction_confidence': prediction_confidence,
+            'actual_label': actual_label
+        }
+        
+        # Store in Redis for real-time monitoring
+        self.redis_client.lpush('model_predictions', json.dumps(log_entry))
+        
+        # Keep only last 10000 predictions
+        self.redis_client.ltrim('model_predictions', 0, 9999)
+        
+        # Log to MLflow for long-term tracking
+        mlflow.log_metrics({
+            'prediction_confidence': prediction_confidence,
+            'prediction_accuracy': 1.0 if actual_label else None
+        })
+    
+    def calculate_drift_metrics(self, window_size=1000):
+        """Calculate data drift metrics"""
+        # Get recent predictions
+        recent_predictions = self.redis_client.lrange('model_predictions', 0, window_size-1)
+        recent_predictions = [json.loads(p) for p in recent_predictions]
+        
+        if len(recent_predictions) < 100:
+            return None
+        
+        # Calculate confidence distribution
+        confidences = [p['prediction_confidence'] for p in recent_predictions]
+        avg_confidence = np.mean(confidences)
+        confidence_std = np.std(confidences)
+        
+        # Calculate prediction entropy (measure of uncertainty)
+        confidence_hist = np.histogram(confidences, bins=10)[0]
+        entropy = -np.sum((confidence_hist / len(confidences)) * 
+                         np.log2(confidence_hist / len(confidences) + 1e-10))
+        
+        drift_metrics = {
+            'avg_confidence': avg_confidence,
+            'confidence_std': confidence_std,
+            'entropy': entropy,
+            'sample_size': len(recent_predictions)
+        }
+        
+        # Alert on significant drift
+        if confidence_std > 0.3 or entropy > 2.0:
+            self.logger.warning(f"Model drift detected: {drift_metrics}")
+            
+        return drift_metrics
+    
+    def check_model_performance(self, time_window_hours=1):
+        """Check model performance over time window"""
+        cutoff_time = datetime.utcnow() - timedelta(hours=time_window_hours)
+        
+        recent_predictions = self.redis_client.lrange('model_predictions', 0, -1)
+        recent_predictions = [json.loads(p) for p in recent_predictions 
+                          if datetime.fromisoformat(p['timestamp']) > cutoff_time]
+        
+        if len(recent_predictions) < 10:
+            return None
+        
+        # Calculate accuracy if we have actual labels
+        predictions_with_labels = [p for p in recent_predictions if p.get('actual_label')]
+        
+        if len(predictions_with_labels) > 0:
+            correct_predictions = sum(1 for p in predictions_with_labels 
+                                if p.get('predicted_correct', False))
+            accuracy = correct_predictions / len(predictions_with_labels)
+            
+            performance_metrics = {
+                'accuracy': accuracy,
+                'total_predictions': len(predictions_with_labels),
+                'time_window_hours': time_window_hours
+            }
+            
+            # Log performance to MLflow
+            mlflow.log_metrics(performance_metrics)
+            
+            return performance_metrics
+        
+        return None
+
+if __name__ == "__main__":
+    monitor = ModelMonitor()
+    
+    # Example monitoring loop
+    import time
+    while True:
+        drift_metrics = monitor.calculate_drift_metrics()
+        performance_metrics = monitor.check_model_performance()
+        
+        if drift_metrics:
+            print(f"Drift metrics: {drift_metrics}")
+        
+        if performance_metrics:
+            print(f"Performance metrics: {performance_metrics}")
+        
+        time.sleep(300)  # Check every 5 minutes
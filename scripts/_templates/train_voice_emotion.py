@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Voice Emotion Detection Training Pipeline
+Trains CNN+LSTM model for real-time voice emotion recognition
+"""
+
+import os
+import torch
+import torch.nn as nn
+import torchaudio
+import librosa
+import numpy as np
+import pandas as pd
+from torch.utils.data import Dataset, DataLoader
+from transformers import Wav2Vec2Model, Wav2Vec2Processor
+import mlflow
+import optuna
+
+class VoiceEmotionDataset(Dataset):
+    def __init__(self, audio_files, labels, sample_rate=16000):
+        self.audio_files = audio_files
+        self.labels = labels
+        self.sample_rate = sample_rate
+        self.processor = Wav2Vec2Processor.from_pretrained("facebook/wav2vec2-base")
+        
+    def __len__(self):
+        return len(self.audio_files)
+    
+    def __getitem__(self, idx):
+        audio_path = self.audio_files[idx]
+        label = self.labels[idx]
+        
+        # Load and process audio
+        speech_array, sampling_rate = torchaudio.load(audio_path)
+        if sampling_rate != self.sample_rate:
+            resampler = torchaudio.transforms.Resample(sampling_rate, self.sample_rate)
+            speech_array = resampler(speech_array)
+        
+        # Extract features
+        inputs = self.processor(speech_array.squeeze().numpy(), 
+                               sampling_rate=self.sample_rate, 
+                               return_tensors="pt")
+        
+        return {
+            'input_values': inputs['input_values'].squeeze(),
+            'attention_mask': inputs['attention_mask'].squeeze(),
+            'labels': torch.tensor(label, dtype=torch.long)
+        }
+
+class VoiceEmotionModel(nn.Module):
+    def __init__(self, num_classes=7, hidden_size=256):
+        super().__init__()
+        self.wav2vec = Wav2Vec2Model.from_pretrained("facebook/wav2vec2-base")
+        self.lstm = nn.LSTM(self.wav2vec.config.hidden_size, hidden_size, 
+                           batch_first=True, bidirectional=True)
+        self.classifier = nn.Sequential(
+            nn.Linear(hidden_size * 2, 128),
+            nn.ReLU(),
+            nn.Dropout(0.3),
+            nn.Linear(128, num_classes)
+        )
+        
+    def forward(self, input_values, attention_mask):
+        # Extract features
+        with torch.no_grad():
+            features = self.wav2vec(input_values, attention_mask=attention_mask).last_hidden_state
+        
+        # LSTM processing
+        lstm_out, _ = self.lstm(features)
+        
+        # Classification
+        logits = self.classifier(lstm_out[:, -1, :])  # Use last time step
+        return logits
+
+def train_model(model, train_loader, val_loader, num_epochs=50, learning_rate=1e-4):
+    """Train the voice emotion model"""
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    model = model.to(device)
+    
+    criterion = nn.CrossEntropyLoss()
+    optimizer = torch.optim.AdamW(model.parameters(), lr=learning_rate)
+    scheduler = torch.optim.lr_scheduler.ReduceLROnPlateau(optimizer, patience=5)
+    
+    best_val_accuracy = 0.0
+    
+    for epoch in range(num_epochs):
+        model.train()
+        train_loss = 0.0
+        train_correct = 0
+        train_total = 0
+        
+        for batch in train_loader:
+            input_values = batch['input_values'].to(device)
+            attention_mask = batch['attention_mask'].to(device)
+            labels = batch['labels'].to(device)
+            
+            optimizer.zero_grad()
+            outputs = model(input_values, attention_mask)
+            loss = criterion(outputs, labels)
+            loss.backward()
+            optimizer.step()
+            
+            train_loss += loss.item()
+            _, predicted = torch.max(outputs.data, 1)
+            train_total += labels.size(0)
+            train_correct += (predicted == labels).sum().item()
+        
+        # Validation
+        model.eval()
+        val_loss = 0.0
+        val_correct = 0
+        val_total = 0
+        
+        with torch.no_grad():
+            for batch in val_loader:
+                input_values = batch['input_values'].to(device)
+                attention_mask = batch['attention_mask'].to(device)
+                labels = batch['labels'].to(device)
+                
+                outputs = model(input_values, attention_mask)
+                loss = criterion(outputs, labels)
+                val_loss += loss.item()
+                _, predicted = torch.max(outputs.data, 1)
+                val_total += labels.size(0)
+                val_correct += (predicted == labels).sum().item()
+        
+        # Calculate metrics
+        train_accuracy = 100 * train_correct / train_total
+        val_accuracy = 100 * val_correct / val_total
+        
+        # Log metrics
+        mlflow.log_metrics({
+            'epoch': epoch + 1,
+            'train_loss': train_loss / len(train_loader),
+            'train_accuracy': train_accuracy,
+            'val_loss': val_loss / len(val_loader),
+            'val_accuracy': val_accuracy
+        })
+        
+        # Save best model
+        if val_accuracy > best_val_accuracy:
+            best_val_accuracy = val_accuracy
+            torch.save(model.state_dict(), 'best_voice_emotion_model.pth')
+            mlflow.log_artifact('best_voice_emotion_model.pth')
+        
+        scheduler.step(val_loss)
+        
+        print(f'Epoch {epoch+1}/{num_epochs}: '
+              f'Train Loss: {train_loss/len(train_loader):.4f}, '
+              f'Train Acc: {train_accuracy:.2f}%, '
+              f'Val Loss: {val_loss/len(val_loader):.4f}, '
+              f'Val Acc: {val_accuracy:.2f}%')
+
+def objective(trial):
+    """Optuna objective for hyperparameter optimization"""
+    # Suggest hyperparameters
+    lr = trial.suggest_float('lr', 1e-5, 1e-3, log=True)
+    batch_size = trial.suggest_categorical('batch_size', [16, 32, 64])
+    hidden_size = trial.suggest_categorical('hidden_size', [128, 256, 512])
+    
+    # Create model with suggested parameters
+    model = VoiceEmotionModel(hidden_size=hidden_size)
+    
+    # Train with cross-validation
+    # ... (implementation details omitted for brevity)
+    
+    return val_accuracy
+
+if __name__ == "__main__":
+    # Setup MLflow experiment
+    mlflow.set_experiment("voice_emotion_detection")
+    
+    # Hyperparameter optimization
+    study = optuna.create_study(direction='maximize')
+    study.optimize(objective, n_trials=50)
+    
+    print(f"Best trial: {study.best_trial.params}")
+    print(f"Best accuracy: {study.best_value:.2f}%")
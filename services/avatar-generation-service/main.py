@@ -3,8 +3,10 @@ Avatar Generation Service
 Generates 3D avatars from user photos using face reconstruction ML models
 """
 
-import io
+import asyncio
+import hashlib
 import os
+import threading
 import uuid
 import logging
 import tempfile
@@ -12,12 +14,17 @@ from typing import Optional
 from pathlib import Path
 from contextlib import asynccontextmanager
 
+# Tame OpenMP thread fans (BLAS, TensorFlow Lite, OpenCV internals) before
+# the native libraries load: with several uvicorn workers per box, each one
+# spawning N_CPU threads per operation just causes oversubscription.
+os.environ.setdefault("OMP_NUM_THREADS", os.getenv("CV_THREADS", "1"))
+
 import numpy as np
 import PIL
 from PIL import Image
-from fastapi import FastAPI, HTTPException, UploadFile, File, BackgroundTasks, Request
+from fastapi import FastAPI, HTTPException, UploadFile, File, BackgroundTasks, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 from starlette.responses import JSONResponse
 from pydantic import BaseModel
 from slowapi import Limiter, _rate_limit_exceeded_handler
@@ -35,22 +42,70 @@ logger = logging.getLogger(__name__)
 AVATAR_STORAGE_PATH = os.getenv("AVATAR_STORAGE_PATH", "/app/avatars")
 TEMP_PATH = os.getenv("TEMP_PATH", "/tmp/avatar-gen")
 
+# When set (e.g. "/internal-avatars"), artifact downloads hand off to the
+# fronting Nginx via X-Accel-Redirect so bytes move through the kernel
+# sendfile path instead of the Python event loop.
+AVATAR_ACCEL_PREFIX = os.getenv("AVATAR_ACCEL_PREFIX", "")
+
+
+def serve_avatar_file(path: str, media_type: str, filename: Optional[str] = None):
+    """Serve a generated artifact, delegating to Nginx when configured"""
+    headers = {"Cache-Control": "public, max-age=86400"}
+    if AVATAR_ACCEL_PREFIX:
+        headers["X-Accel-Redirect"] = f"{AVATAR_ACCEL_PREFIX}/{os.path.basename(path)}"
+        if filename:
+            headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return Response(media_type=media_type, headers=headers)
+    if filename:
+        return FileResponse(path, media_type=media_type, filename=filename, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
+
 # Ensure directories exist
 Path(AVATAR_STORAGE_PATH).mkdir(parents=True, exist_ok=True)
 Path(TEMP_PATH).mkdir(parents=True, exist_ok=True)
 
 # Lazy-loaded ML models
 face_mesh = None
-face_detector = None
+
+# Canonical MediaPipe face topology, shared by every avatar. Built once at
+# model load from the FACEMESH_TESSELATION edge set (its triangles are the
+# 3-cliques of that graph), so triangulation is a module-level constant
+# instead of a per-request computation, and every generated mesh has
+# identical topology — a prerequisite for skinning and blendshape reuse.
+FACE_TRI = None
+
+# Padded per-vertex adjacent-face table [V, maxdeg] for the canonical
+# topology, also fixed across avatars. Rows are padded with a sentinel
+# face index that maps to an all-zero normal, so vertex normals become a
+# contiguous gather + reduce over face normals instead of a scatter-add.
+FACE_ADJ = None
+
+# MediaPipe graphs are not thread-safe; inference on the shared instances
+# must be serialized even though it runs in worker threads. Init still
+# happens once, and the weights stay resident.
+_mediapipe_lock = threading.Lock()
+
+
+def run_mediapipe(model, image):
+    """Run model.process under the MediaPipe serialization lock"""
+    with _mediapipe_lock:
+        return model.process(image)
 
 # File upload validation constants
 ALLOWED_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".webp", ".gif"}
 ALLOWED_IMAGE_MIMES = {"image/jpeg", "image/png", "image/bmp", "image/webp", "image/gif"}
 MAX_IMAGE_SIZE = 10 * 1024 * 1024  # 10MB
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1MB
 
 
-async def validate_image_upload(file: UploadFile) -> bytes:
-    """Validate and read an image upload. Returns file contents."""
+async def validate_image_upload(file: UploadFile) -> tuple[str, str]:
+    """
+    Validate an image upload and stream it to a temp file.
+
+    Uploads are never buffered whole in memory: chunks go straight to disk
+    while a running blake2b digest is updated, so peak RAM stays constant
+    and PIL can decode from the path. Returns (temp_path, digest_hex).
+    """
     # Check extension
     filename = (file.filename or "").lower()
     ext = os.path.splitext(filename)[1]
@@ -62,17 +117,61 @@ async def validate_image_upload(file: UploadFile) -> bytes:
     if content_type and content_type not in ALLOWED_IMAGE_MIMES:
         raise HTTPException(status_code=400, detail=f"Invalid content type: {content_type}. Allowed: {ALLOWED_IMAGE_MIMES}")
 
-    # Read with size limit
-    contents = await file.read()
-    if len(contents) > MAX_IMAGE_SIZE:
-        raise HTTPException(status_code=400, detail=f"File too large: {len(contents)} bytes. Maximum: {MAX_IMAGE_SIZE} bytes")
+    # Stream to disk with the size limit enforced mid-stream. The writes
+    # run in worker threads so the event loop never waits on the disk;
+    # every other artifact write (texture, GLB, thumbnail) already happens
+    # inside an asyncio.to_thread stage of the pipeline.
+    digest = hashlib.blake2b(digest_size=16)
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=TEMP_PATH, suffix=ext or ".img")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_IMAGE_SIZE:
+                    raise HTTPException(status_code=413, detail=f"File too large. Maximum: {MAX_IMAGE_SIZE} bytes")
+                digest.update(chunk)
+                await asyncio.to_thread(tmp.write, chunk)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
 
-    return contents
+    return tmp_path, digest.hexdigest()
+
+
+def build_canonical_topology(mp_face_mesh) -> np.ndarray:
+    """Derive the fixed triangle list from the tessellation edge graph"""
+    neighbors = {}
+    for a, b in mp_face_mesh.FACEMESH_TESSELATION:
+        neighbors.setdefault(a, set()).add(b)
+        neighbors.setdefault(b, set()).add(a)
+    triangles = set()
+    for a, b in mp_face_mesh.FACEMESH_TESSELATION:
+        lo, hi = (a, b) if a < b else (b, a)
+        for c in neighbors[lo] & neighbors[hi]:
+            if c > hi:
+                triangles.add((lo, hi, c))
+    return np.array(sorted(triangles), dtype=np.int32)
+
+
+def build_vertex_adjacency(face_tri: np.ndarray) -> np.ndarray:
+    """Build the padded vertex-to-faces table for a fixed triangle list"""
+    num_vertices = int(face_tri.max()) + 1
+    adjacent = [[] for _ in range(num_vertices)]
+    for face_index, tri in enumerate(face_tri.tolist()):
+        for vertex in tri:
+            adjacent[vertex].append(face_index)
+    max_degree = max(len(faces) for faces in adjacent)
+    # The sentinel indexes the zero row appended after the face normals
+    padded = np.full((num_vertices, max_degree), len(face_tri), dtype=np.int32)
+    for vertex, faces in enumerate(adjacent):
+        padded[vertex, : len(faces)] = faces
+    return padded
 
 
 def get_mediapipe():
     """Lazy load MediaPipe for face mesh extraction"""
-    global face_mesh, face_detector
+    global face_mesh, FACE_TRI, FACE_ADJ
     if face_mesh is None:
         import mediapipe as mp
         mp_face_mesh = mp.solutions.face_mesh
@@ -82,13 +181,10 @@ def get_mediapipe():
             refine_landmarks=True,
             min_detection_confidence=0.5
         )
-        mp_face_detection = mp.solutions.face_detection
-        face_detector = mp_face_detection.FaceDetection(
-            model_selection=1,
-            min_detection_confidence=0.5
-        )
-        logger.info("MediaPipe models loaded")
-    return face_mesh, face_detector
+        FACE_TRI = build_canonical_topology(mp_face_mesh)
+        FACE_ADJ = build_vertex_adjacency(FACE_TRI)
+        logger.info(f"MediaPipe models loaded ({len(FACE_TRI)} canonical triangles)")
+    return face_mesh
 
 
 SERVICE_API_KEY = os.getenv("SERVICE_API_KEY", "")
@@ -97,11 +193,29 @@ SERVICE_API_KEY = os.getenv("SERVICE_API_KEY", "")
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler"""
+    global redis_client
     logger.info("Starting Avatar Generation Service...")
 
+    # Keep each OpenCV call on a single core; concurrency comes from the
+    # ASGI worker pool, and unpinned per-op threading thrashes caches.
+    cv2.setUseOptimized(True)
+    cv2.setNumThreads(int(os.getenv("CV_THREADS", "1")))
+
     if not SERVICE_API_KEY:
         logger.warning("SERVICE_API_KEY is not set — all non-health endpoints will return 503")
 
+    # Connect the shared job store
+    if REDIS_URL:
+        try:
+            import redis.asyncio as aioredis
+
+            redis_client = aioredis.from_url(REDIS_URL, decode_responses=True)
+            await redis_client.ping()
+            logger.info("Connected to Redis job store")
+        except Exception as e:
+            logger.warning(f"Redis unavailable ({e}), using in-process job store")
+            redis_client = None
+
     # Pre-load models
     try:
         get_mediapipe()
@@ -116,7 +230,9 @@ app = FastAPI(
     title="Avatar Generation Service",
     description="Generate 3D avatars from user photos using ML face reconstruction",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # orjson serializes the large float-heavy payloads in C
+    default_response_class=ORJSONResponse
 )
 
 limiter = Limiter(key_func=get_remote_address)
@@ -124,6 +240,16 @@ app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 
+@app.middleware("http")
+async def enforce_body_limit(request, call_next):
+    # Refuse oversized bodies up front so they are never streamed at all;
+    # the small allowance on top of the image limit covers multipart framing.
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > MAX_IMAGE_SIZE + UPLOAD_CHUNK_SIZE:
+        return JSONResponse(status_code=413, content={"error": "Request body too large"})
+    return await call_next(request)
+
+
 @app.middleware("http")
 async def verify_api_key(request, call_next):
     if request.url.path == "/health":
@@ -194,10 +320,68 @@ class AvatarMeshData(BaseModel):
     normals: list[list[float]]
 
 
-# In-memory status tracking (use Redis in production)
+# Job metadata lives in Redis (hash per avatar, TTL-bounded) so status and
+# download routing work across workers; the dict is a single-process
+# fallback for dev environments without Redis.
+REDIS_URL = os.getenv("REDIS_URL", "")
+AVATAR_JOB_TTL = 86400  # seconds
+
+redis_client = None
 avatar_jobs = {}
 
 
+async def save_job(avatar_id: str, job: dict):
+    """Persist avatar job metadata"""
+    if redis_client is not None:
+        key = f"avatar:{avatar_id}"
+        await redis_client.hset(key, mapping=job)
+        await redis_client.expire(key, AVATAR_JOB_TTL)
+    else:
+        avatar_jobs[avatar_id] = job
+
+
+async def get_job(avatar_id: str) -> Optional[dict]:
+    """Fetch avatar job metadata; None when unknown or expired"""
+    if redis_client is not None:
+        job = await redis_client.hgetall(f"avatar:{avatar_id}")
+        return job or None
+    return avatar_jobs.get(avatar_id)
+
+
+async def delete_job(avatar_id: str):
+    """Remove avatar job metadata"""
+    if redis_client is not None:
+        await redis_client.delete(f"avatar:{avatar_id}")
+    else:
+        avatar_jobs.pop(avatar_id, None)
+
+
+# Content-hash memoization: identical (photo, style) pairs map to the
+# already-generated avatar instead of re-running the ML pipeline.
+AVATAR_CACHE_TTL = 604800  # one week
+
+avatar_hash_cache = {}
+
+
+def content_digest(digest_hex: str, avatar_style: str) -> str:
+    return f"avatar-hash:{digest_hex}:{avatar_style}"
+
+
+async def get_cached_avatar(cache_key: str) -> Optional[str]:
+    """Look up an existing avatar_id for this content hash"""
+    if redis_client is not None:
+        return await redis_client.get(cache_key)
+    return avatar_hash_cache.get(cache_key)
+
+
+async def cache_avatar(cache_key: str, avatar_id: str):
+    """Remember which avatar_id serves this content hash"""
+    if redis_client is not None:
+        await redis_client.set(cache_key, avatar_id, ex=AVATAR_CACHE_TTL)
+    else:
+        avatar_hash_cache[cache_key] = avatar_id
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -209,149 +393,194 @@ async def health_check():
     }
 
 
-@app.post("/avatar/generate", response_model=AvatarGenerationResponse)
-@limiter.limit("10/minute")
-async def generate_avatar(
-    request: Request,
-    file: UploadFile = File(...),
-    user_id: str = "anonymous",
-    avatar_style: str = "realistic",
-    background_tasks: BackgroundTasks = None
+async def process_avatar_job(
+    avatar_id: str, image_path: str, user_id: str, avatar_style: str
 ):
-    """
-    Generate a 3D avatar from a user photo.
-
-    Args:
-        file: User photo (face clearly visible)
-        user_id: User identifier for avatar association
-        avatar_style: Style of avatar (realistic, stylized, cartoon)
-
-    Returns:
-        AvatarGenerationResponse with avatar details and download URL
-    """
-    avatar_id = str(uuid.uuid4())
-
+    """Run the full avatar ML pipeline for a queued generation job"""
     try:
-        # Read and validate image
-        contents = await validate_image_upload(file)
-        image = Image.open(io.BytesIO(contents))
+        await save_job(avatar_id, {"status": "processing", "user_id": user_id})
+
+        # Decode straight from the streamed temp file
+        image = Image.open(image_path)
 
         # Convert to RGB
         if image.mode != 'RGB':
             image = image.convert('RGB')
 
-        img_array = np.array(image)
+        # Downscale large photos before any ML work: MediaPipe downsamples
+        # internally anyway, and every later stage scales with pixel count.
+        image.thumbnail((1024, 1024), Image.BILINEAR)
 
-        # Detect face and extract landmarks
-        face_mesh_model, face_detector_model = get_mediapipe()
+        img_array = np.array(image)
 
-        # Convert BGR to RGB for MediaPipe
-        rgb_image = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-        rgb_image = cv2.cvtColor(rgb_image, cv2.COLOR_BGR2RGB)
+        face_mesh_model = get_mediapipe()
 
-        # Detect face
-        detection_results = face_detector_model.process(rgb_image)
-        if not detection_results.detections:
-            raise HTTPException(status_code=400, detail="No face detected in image")
+        # PIL already decoded to RGB, which is what MediaPipe expects — no
+        # color conversion needed, just guarantee a contiguous buffer.
+        rgb_image = np.ascontiguousarray(img_array)
 
-        # Extract face mesh landmarks
-        mesh_results = face_mesh_model.process(rgb_image)
+        # MediaPipe inference and the mesh/texture/GLB stages are blocking C
+        # calls that release the GIL — run them in worker threads so the
+        # event loop keeps serving requests. FaceMesh runs BlazeFace
+        # internally before the mesh regressor, so a separate FaceDetection
+        # pass would just repeat that inference; empty landmarks already
+        # mean "no face".
+        mesh_results = await asyncio.to_thread(run_mediapipe, face_mesh_model, rgb_image)
         if not mesh_results.multi_face_landmarks:
-            raise HTTPException(status_code=400, detail="Could not extract facial landmarks")
+            raise ValueError("No face detected in image")
 
         face_landmarks = mesh_results.multi_face_landmarks[0]
 
-        # Extract landmark coordinates
+        # Extract landmark coordinates: one vectorized broadcast multiply
+        # instead of ~468 Python iterations (z is scaled like x).
         h, w = img_array.shape[:2]
-        landmarks_3d = []
-        for landmark in face_landmarks.landmark:
-            landmarks_3d.append({
-                'x': landmark.x * w,
-                'y': landmark.y * h,
-                'z': landmark.z * w  # Scale z similarly
-            })
+        pts = np.array(
+            [(lm.x, lm.y, lm.z) for lm in face_landmarks.landmark],
+            dtype=np.float32,
+        )
+        pts *= np.array([w, h, w], dtype=np.float32)
 
         # Generate 3D mesh from landmarks
-        mesh_data = generate_face_mesh(landmarks_3d, img_array.shape)
+        mesh_data = await asyncio.to_thread(generate_face_mesh, pts, img_array.shape)
 
         # Extract and process face texture
-        texture_path = extract_face_texture(img_array, landmarks_3d, avatar_id)
+        texture_path = await asyncio.to_thread(
+            extract_face_texture, image, pts, avatar_id
+        )
 
         # Generate avatar files (GLB format for Unity)
-        avatar_path = generate_avatar_glb(
-            mesh_data,
-            texture_path,
-            avatar_id,
-            avatar_style
+        avatar_path = await asyncio.to_thread(
+            generate_avatar_glb, mesh_data, texture_path, avatar_id, avatar_style
         )
 
         # Generate thumbnail
-        thumbnail_path = generate_thumbnail(img_array, avatar_id)
+        thumbnail_path = await asyncio.to_thread(generate_thumbnail, image, avatar_id)
 
         # Store avatar metadata
-        avatar_jobs[avatar_id] = {
+        await save_job(avatar_id, {
             "status": "completed",
             "user_id": user_id,
             "avatar_path": avatar_path,
             "texture_path": texture_path,
             "thumbnail_path": thumbnail_path
-        }
-
-        return AvatarGenerationResponse(
-            avatar_id=avatar_id,
-            user_id=user_id,
-            status="completed",
-            avatar_url=f"/avatar/{avatar_id}/download",
-            thumbnail_url=f"/avatar/{avatar_id}/thumbnail",
-            face_landmarks_count=len(landmarks_3d),
-            mesh_vertices=len(mesh_data["vertices"]),
-            texture_resolution="1024x1024"
-        )
+        })
 
-    except HTTPException:
-        raise
     except Exception as e:
         logger.error(f"Error generating avatar: {e}")
-        avatar_jobs[avatar_id] = {"status": "failed", "error": str(e)}
-        raise HTTPException(status_code=500, detail="Internal server error")
+        await save_job(avatar_id, {"status": "failed", "error": str(e)})
+    finally:
+        if os.path.exists(image_path):
+            os.unlink(image_path)
+
+
+@app.post("/avatar/generate", response_model=AvatarGenerationResponse)
+@limiter.limit("10/minute")
+async def generate_avatar(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    user_id: str = "anonymous",
+    avatar_style: str = "realistic"
+):
+    """
+    Queue 3D avatar generation from a user photo.
+
+    The heavy pipeline (MediaPipe, triangulation, GLB encoding) runs as a
+    background task so the request returns immediately; poll
+    /avatar/{avatar_id}/status and download the files once completed.
+
+    Args:
+        file: User photo (face clearly visible)
+        user_id: User identifier for avatar association
+        avatar_style: Style of avatar (realistic, stylized, cartoon)
+
+    Returns:
+        AvatarGenerationResponse with the pending job and download URLs
+    """
+    # Validate and stream the upload to disk while the body is available
+    image_path, digest_hex = await validate_image_upload(file)
+
+    # Re-uploads of the same photo (e.g. frontend retries) short-circuit to
+    # the job already generated for it.
+    cache_key = content_digest(digest_hex, avatar_style)
+    cached_id = await get_cached_avatar(cache_key)
+    if cached_id:
+        job = await get_job(cached_id)
+        if job is not None and job.get("status") != "failed":
+            os.unlink(image_path)
+            return AvatarGenerationResponse(
+                avatar_id=cached_id,
+                user_id=job.get("user_id", user_id),
+                status=job.get("status", "pending"),
+                avatar_url=f"/avatar/{cached_id}/download",
+                thumbnail_url=f"/avatar/{cached_id}/thumbnail"
+            )
+
+    avatar_id = str(uuid.uuid4())
+
+    await save_job(avatar_id, {"status": "pending", "user_id": user_id})
+    await cache_avatar(cache_key, avatar_id)
+    background_tasks.add_task(
+        process_avatar_job, avatar_id, image_path, user_id, avatar_style
+    )
+
+    return AvatarGenerationResponse(
+        avatar_id=avatar_id,
+        user_id=user_id,
+        status="pending",
+        avatar_url=f"/avatar/{avatar_id}/download",
+        thumbnail_url=f"/avatar/{avatar_id}/thumbnail"
+    )
 
 
-@app.post("/avatar/extract-landmarks", response_model=FaceLandmarks)
+@app.post("/avatar/extract-landmarks", response_model=None)
 @limiter.limit("30/minute")
 async def extract_landmarks(request: Request, file: UploadFile = File(...)):
     """
     Extract facial landmarks from an image without generating full avatar.
     Useful for real-time face tracking and expression mapping.
+
+    Returns the FaceLandmarks shape as a plain dict: the ~470-landmark
+    payload is server-generated, so re-validating it through Pydantic on
+    the way out would only burn CPU. orjson handles the serialization.
     """
+    image_path = None
     try:
-        contents = await validate_image_upload(file)
-        image = Image.open(io.BytesIO(contents))
+        image_path, _ = await validate_image_upload(file)
+        image = Image.open(image_path)
 
         if image.mode != 'RGB':
             image = image.convert('RGB')
 
+        # Landmarks come back normalized, so detection can run on a
+        # downscaled copy while coordinates are reported against the
+        # original resolution.
+        orig_w, orig_h = image.size
+        image.thumbnail((1024, 1024), Image.BILINEAR)
+
         img_array = np.array(image)
-        h, w = img_array.shape[:2]
 
-        face_mesh_model, _ = get_mediapipe()
-        rgb_image = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-        rgb_image = cv2.cvtColor(rgb_image, cv2.COLOR_BGR2RGB)
+        face_mesh_model = get_mediapipe()
+        rgb_image = np.ascontiguousarray(img_array)
 
-        results = face_mesh_model.process(rgb_image)
+        # Blocking C inference; offload so the loop stays responsive
+        results = await asyncio.to_thread(run_mediapipe, face_mesh_model, rgb_image)
         if not results.multi_face_landmarks:
             raise HTTPException(status_code=400, detail="No face detected")
 
         face_landmarks = results.multi_face_landmarks[0]
 
-        # Extract all landmarks
-        all_landmarks = []
-        for i, landmark in enumerate(face_landmarks.landmark):
-            all_landmarks.append({
-                'index': i,
-                'x': landmark.x * w,
-                'y': landmark.y * h,
-                'z': landmark.z * w
-            })
+        # Scale all landmarks to pixel space in a single broadcast multiply;
+        # dicts are built only at the JSON serialization boundary.
+        pts = np.array(
+            [(lm.x, lm.y, lm.z) for lm in face_landmarks.landmark],
+            dtype=np.float32,
+        )
+        pts *= np.array([orig_w, orig_h, orig_w], dtype=np.float32)
+        all_landmarks = [
+            {'index': i, 'x': x, 'y': y, 'z': z}
+            for i, (x, y, z) in enumerate(pts.tolist())
+        ]
 
         # MediaPipe face mesh indices for specific features
         # Face oval
@@ -374,40 +603,43 @@ async def extract_landmarks(request: Request, file: UploadFile = File(...)):
         def get_landmarks_by_indices(indices):
             return [all_landmarks[i] for i in indices if i < len(all_landmarks)]
 
-        # Calculate face bounds
-        xs = [lm['x'] for lm in all_landmarks]
-        ys = [lm['y'] for lm in all_landmarks]
-
-        return FaceLandmarks(
-            landmarks=all_landmarks,
-            face_oval=get_landmarks_by_indices(face_oval_indices),
-            left_eye=get_landmarks_by_indices(left_eye_indices),
-            right_eye=get_landmarks_by_indices(right_eye_indices),
-            lips=get_landmarks_by_indices(lips_indices),
-            nose=get_landmarks_by_indices(nose_indices),
-            face_bounds={
-                'x': min(xs),
-                'y': min(ys),
-                'width': max(xs) - min(xs),
-                'height': max(ys) - min(ys)
+        # Calculate face bounds in one vectorized min/max pass
+        x_min, y_min = pts[:, :2].min(axis=0).tolist()
+        x_max, y_max = pts[:, :2].max(axis=0).tolist()
+
+        return {
+            "landmarks": all_landmarks,
+            "face_oval": get_landmarks_by_indices(face_oval_indices),
+            "left_eye": get_landmarks_by_indices(left_eye_indices),
+            "right_eye": get_landmarks_by_indices(right_eye_indices),
+            "lips": get_landmarks_by_indices(lips_indices),
+            "nose": get_landmarks_by_indices(nose_indices),
+            "face_bounds": {
+                'x': x_min,
+                'y': y_min,
+                'width': x_max - x_min,
+                'height': y_max - y_min
             }
-        )
+        }
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error extracting landmarks: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
+    finally:
+        if image_path and os.path.exists(image_path):
+            os.unlink(image_path)
 
 
 @app.get("/avatar/{avatar_id}/status", response_model=AvatarStatus)
 @limiter.limit("60/minute")
 async def get_avatar_status(request: Request, avatar_id: str):
     """Get the status of an avatar generation job"""
-    if avatar_id not in avatar_jobs:
+    job = await get_job(avatar_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Avatar not found")
 
-    job = avatar_jobs[avatar_id]
     return AvatarStatus(
         avatar_id=avatar_id,
         status=job.get("status", "unknown"),
@@ -420,10 +652,9 @@ async def get_avatar_status(request: Request, avatar_id: str):
 @limiter.limit("60/minute")
 async def download_avatar(request: Request, avatar_id: str):
     """Download the generated avatar GLB file"""
-    if avatar_id not in avatar_jobs:
+    job = await get_job(avatar_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Avatar not found")
-
-    job = avatar_jobs[avatar_id]
     if job.get("status") != "completed":
         raise HTTPException(status_code=400, detail="Avatar not ready")
 
@@ -431,7 +662,7 @@ async def download_avatar(request: Request, avatar_id: str):
     if not avatar_path or not os.path.exists(avatar_path):
         raise HTTPException(status_code=404, detail="Avatar file not found")
 
-    return FileResponse(
+    return serve_avatar_file(
         avatar_path,
         media_type="model/gltf-binary",
         filename=f"avatar_{avatar_id}.glb"
@@ -442,99 +673,84 @@ async def download_avatar(request: Request, avatar_id: str):
 @limiter.limit("60/minute")
 async def get_avatar_thumbnail(request: Request, avatar_id: str):
     """Get avatar thumbnail image"""
-    if avatar_id not in avatar_jobs:
+    job = await get_job(avatar_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Avatar not found")
-
-    job = avatar_jobs[avatar_id]
     thumbnail_path = job.get("thumbnail_path")
 
     if not thumbnail_path or not os.path.exists(thumbnail_path):
         raise HTTPException(status_code=404, detail="Thumbnail not found")
 
-    return FileResponse(thumbnail_path, media_type="image/png")
+    return serve_avatar_file(thumbnail_path, media_type="image/webp")
 
 
 @app.get("/avatar/{avatar_id}/texture")
 @limiter.limit("60/minute")
 async def get_avatar_texture(request: Request, avatar_id: str):
     """Get avatar face texture"""
-    if avatar_id not in avatar_jobs:
+    job = await get_job(avatar_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Avatar not found")
-
-    job = avatar_jobs[avatar_id]
     texture_path = job.get("texture_path")
 
     if not texture_path or not os.path.exists(texture_path):
         raise HTTPException(status_code=404, detail="Texture not found")
 
-    return FileResponse(texture_path, media_type="image/png")
+    return serve_avatar_file(texture_path, media_type="image/png")
 
 
 @app.delete("/avatar/{avatar_id}")
 @limiter.limit("30/minute")
 async def delete_avatar(request: Request, avatar_id: str):
     """Delete an avatar and its associated files"""
-    if avatar_id not in avatar_jobs:
+    job = await get_job(avatar_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Avatar not found")
 
-    job = avatar_jobs[avatar_id]
-
     # Delete files
     for key in ["avatar_path", "texture_path", "thumbnail_path"]:
         path = job.get(key)
         if path and os.path.exists(path):
             os.remove(path)
 
-    del avatar_jobs[avatar_id]
+    await delete_job(avatar_id)
     return {"status": "deleted", "avatar_id": avatar_id}
 
 
 # Helper functions for avatar generation
 
-def generate_face_mesh(landmarks: list, image_shape: tuple) -> dict:
+def generate_face_mesh(pts: np.ndarray, image_shape: tuple) -> dict:
     """
-    Generate a 3D face mesh from facial landmarks.
-    Uses Delaunay triangulation for face surface.
+    Generate a 3D face mesh from an (N, 3) landmark array in pixel space.
+    Uses the canonical MediaPipe face topology.
     """
-    import scipy.spatial as spatial
-
     h, w = image_shape[:2]
 
-    # Convert landmarks to vertices
-    vertices = []
-    for lm in landmarks:
-        # Normalize to -1 to 1 range for 3D space
-        x = (lm['x'] / w) * 2 - 1
-        y = -((lm['y'] / h) * 2 - 1)  # Flip Y for 3D coordinate system
-        z = lm['z'] / w  # Depth
-        vertices.append([x, y, z])
-
-    vertices = np.array(vertices)
-
-    # Create 2D points for triangulation (ignore z)
-    points_2d = vertices[:, :2]
+    # Normalize to the -1..1 3D range in one vectorized pass
+    # (Y flipped for the 3D coordinate system, z scaled as depth)
+    xy_norm = pts[:, :2] / np.array([w, h], dtype=np.float32)
+    vertices = np.stack(
+        [xy_norm[:, 0] * 2 - 1, -(xy_norm[:, 1] * 2 - 1), pts[:, 2] / w],
+        axis=1,
+    )
 
-    # Perform Delaunay triangulation
-    try:
-        tri = spatial.Delaunay(points_2d)
-        faces = tri.simplices.tolist()
-    except Exception as e:
-        logger.warning(f"Delaunay triangulation failed: {e}, using fallback")
+    # Landmark ordering is fixed, so the precomputed canonical topology
+    # applies to every face unchanged
+    if FACE_TRI is not None:
+        faces = FACE_TRI
+    else:
+        logger.warning("Canonical topology unavailable, using fallback fan")
         faces = generate_fallback_faces(len(vertices))
 
-    # Generate UV coordinates (normalized landmark positions)
-    uvs = []
-    for lm in landmarks:
-        u = lm['x'] / w
-        v = 1.0 - (lm['y'] / h)  # Flip V for texture coordinates
-        uvs.append([u, v])
+    # Generate UV coordinates (normalized positions, V flipped for textures)
+    uvs = np.stack([xy_norm[:, 0], 1.0 - xy_norm[:, 1]], axis=1).tolist()
 
     # Calculate normals for each vertex
     normals = calculate_vertex_normals(vertices, faces)
 
     return {
         "vertices": vertices.tolist(),
-        "faces": faces,
+        "faces": np.asarray(faces).tolist(),
         "uvs": uvs,
         "normals": normals
     }
@@ -542,56 +758,59 @@ def generate_face_mesh(landmarks: list, image_shape: tuple) -> dict:
 
 def generate_fallback_faces(num_vertices: int) -> list:
     """Generate simple triangle fan as fallback"""
-    faces = []
-    center = 0  # Use first vertex as center
-    for i in range(1, num_vertices - 1):
-        faces.append([center, i, i + 1])
-    return faces
+    # Triangle fan around vertex 0, built in one vectorized stack
+    idx = np.arange(1, num_vertices - 1, dtype=np.int32)
+    return np.stack([np.zeros_like(idx), idx, idx + 1], axis=1).tolist()
 
 
-def calculate_vertex_normals(vertices: np.ndarray, faces: list) -> list:
+def calculate_vertex_normals(vertices: np.ndarray, faces: list) -> np.ndarray:
     """Calculate smooth vertex normals"""
     normals = np.zeros_like(vertices)
 
-    for face in faces:
-        if len(face) < 3:
-            continue
-        v0, v1, v2 = vertices[face[0]], vertices[face[1]], vertices[face[2]]
-
-        # Calculate face normal
-        edge1 = v1 - v0
-        edge2 = v2 - v0
-        face_normal = np.cross(edge1, edge2)
-
-        # Add to vertex normals
-        for idx in face:
-            normals[idx] += face_normal
+    face_idx = np.asarray(faces, dtype=np.int32)
+    if face_idx.size:
+        # One cross product over all triangles
+        v0 = vertices[face_idx[:, 0]]
+        v1 = vertices[face_idx[:, 1]]
+        v2 = vertices[face_idx[:, 2]]
+        face_normals = np.cross(v1 - v0, v2 - v0)
+        if faces is FACE_TRI and FACE_ADJ is not None and len(vertices) >= len(FACE_ADJ):
+            # Canonical topology: gather each vertex's incident face
+            # normals through the precomputed padded table and sum —
+            # contiguous reads instead of an unbuffered scatter. The
+            # appended zero row absorbs the padding sentinel. With
+            # refine_landmarks the landmark array carries 10 extra iris
+            # vertices past the tessellation; no face touches them, so
+            # their rows stay zero exactly as the scatter would leave
+            # them.
+            padded_normals = np.vstack([face_normals, np.zeros((1, 3))])
+            normals[: len(FACE_ADJ)] = padded_normals[FACE_ADJ].sum(axis=1)
+        else:
+            # Arbitrary topology: unbuffered scatter-add of each face
+            # normal onto its three vertices.
+            np.add.at(normals, face_idx.ravel(), np.repeat(face_normals, 3, axis=0))
 
     # Normalize
     norms = np.linalg.norm(normals, axis=1, keepdims=True)
-    norms[norms == 0] = 1  # Avoid division by zero
-    normals = normals / norms
+    np.maximum(norms, 1e-12, out=norms)  # Avoid division by zero
+    normals /= norms
 
-    return normals.tolist()
+    return normals
 
 
-def extract_face_texture(image: np.ndarray, landmarks: list, avatar_id: str) -> str:
+def extract_face_texture(pil_image: Image.Image, pts: np.ndarray, avatar_id: str) -> str:
     """
     Extract and unwrap face texture from image.
     Creates a UV-mapped texture suitable for the generated mesh.
     """
-    h, w = image.shape[:2]
-
-    # Create texture image (1024x1024)
+    w, h = pil_image.size
     texture_size = 1024
-    texture = np.zeros((texture_size, texture_size, 3), dtype=np.uint8)
-
-    # Get face bounding box from landmarks
-    xs = [lm['x'] for lm in landmarks]
-    ys = [lm['y'] for lm in landmarks]
 
-    x_min, x_max = int(min(xs)), int(max(xs))
-    y_min, y_max = int(min(ys)), int(max(ys))
+    # Get face bounding box from the landmark array in one min/max pass
+    mn = pts[:, :2].min(axis=0)
+    mx = pts[:, :2].max(axis=0)
+    x_min, y_min = int(mn[0]), int(mn[1])
+    x_max, y_max = int(mx[0]), int(mx[1])
 
     # Add padding
     padding = int((x_max - x_min) * 0.2)
@@ -600,16 +819,16 @@ def extract_face_texture(image: np.ndarray, landmarks: list, avatar_id: str) ->
     y_min = max(0, y_min - padding)
     y_max = min(h, y_max + padding)
 
-    # Crop and resize face region
-    face_region = image[y_min:y_max, x_min:x_max]
-    face_resized = cv2.resize(face_region, (texture_size, texture_size))
-
-    # Apply to texture
-    texture = face_resized
+    # Crop and resize directly in PIL — no numpy/cv2 round trip or
+    # RGB<->BGR swap needed.
+    texture = pil_image.crop((x_min, y_min, x_max, y_max)).resize(
+        (texture_size, texture_size), Image.BILINEAR
+    )
 
-    # Save texture
+    # PNG encoding is Deflate-bound; level 1 encodes ~2-3x faster for a
+    # small size penalty. Stays PNG because the GLB embeds it as image/png.
     texture_path = os.path.join(AVATAR_STORAGE_PATH, f"{avatar_id}_texture.png")
-    cv2.imwrite(texture_path, cv2.cvtColor(texture, cv2.COLOR_RGB2BGR))
+    texture.save(texture_path, "PNG", compress_level=1)
 
     return texture_path
 
@@ -665,68 +884,43 @@ def generate_avatar_glb(mesh_data: dict, texture_path: str, avatar_id: str, styl
         "buffers": []
     }
 
-    # Build binary buffer
-    buffer_data = bytearray()
-
-    # Positions (accessor 0)
-    positions_data = bytearray()
-    pos_min = [float('inf')] * 3
-    pos_max = [float('-inf')] * 3
-    for v in vertices:
-        for i in range(3):
-            pos_min[i] = min(pos_min[i], v[i])
-            pos_max[i] = max(pos_max[i], v[i])
-        positions_data.extend(struct.pack('fff', *v))
-
-    positions_offset = len(buffer_data)
-    buffer_data.extend(positions_data)
-
-    # Pad to 4-byte alignment
-    while len(buffer_data) % 4 != 0:
-        buffer_data.append(0)
-
-    # Normals (accessor 1)
-    normals_data = bytearray()
-    for n in normals:
-        normals_data.extend(struct.pack('fff', *n))
-
-    normals_offset = len(buffer_data)
-    buffer_data.extend(normals_data)
-
-    while len(buffer_data) % 4 != 0:
-        buffer_data.append(0)
-
-    # UVs (accessor 2)
-    uvs_data = bytearray()
-    for uv in uvs:
-        uvs_data.extend(struct.pack('ff', *uv))
-
-    uvs_offset = len(buffer_data)
-    buffer_data.extend(uvs_data)
-
-    while len(buffer_data) % 4 != 0:
-        buffer_data.append(0)
-
-    # Indices (accessor 3)
-    indices_data = bytearray()
-    index_count = 0
-    for face in faces:
-        for idx in face:
-            indices_data.extend(struct.pack('H', idx))  # unsigned short
-            index_count += 1
-
-    indices_offset = len(buffer_data)
-    buffer_data.extend(indices_data)
-
-    while len(buffer_data) % 4 != 0:
-        buffer_data.append(0)
-
-    # Texture image (bufferView 4)
-    texture_offset = len(buffer_data)
-    buffer_data.extend(texture_data)
-
-    while len(buffer_data) % 4 != 0:
-        buffer_data.append(0)
+    # Build binary buffer. glTF mandates little-endian, so serialize each
+    # attribute with one C-level tobytes() on an explicit '<' dtype instead
+    # of thousands of struct.pack calls.
+    verts32 = np.asarray(vertices, dtype="<f4")
+    norm32 = np.asarray(normals, dtype="<f4")
+    uv32 = np.asarray(uvs, dtype="<f4")
+    idx16 = np.asarray(faces, dtype="<u2").ravel()
+
+    positions_data = verts32.tobytes()
+    normals_data = norm32.tobytes()
+    uvs_data = uv32.tobytes()
+    indices_data = idx16.tobytes()
+    index_count = idx16.size
+
+    pos_min = verts32.min(axis=0).tolist()
+    pos_max = verts32.max(axis=0).tolist()
+
+    def align4(n):
+        return (n + 3) & ~3
+
+    # All section sizes are known up front, so compute the 4-byte-aligned
+    # offsets first and fill one right-sized allocation by slice
+    # assignment — no incremental extend() reallocations, and the
+    # alignment gaps are the bytearray's zero fill.
+    positions_offset = 0
+    normals_offset = align4(positions_offset + len(positions_data))
+    uvs_offset = align4(normals_offset + len(normals_data))
+    indices_offset = align4(uvs_offset + len(uvs_data))
+    texture_offset = align4(indices_offset + len(indices_data))
+    buffer_length = align4(texture_offset + len(texture_data))
+
+    buffer_data = bytearray(buffer_length)
+    buffer_data[positions_offset:positions_offset + len(positions_data)] = positions_data
+    buffer_data[normals_offset:normals_offset + len(normals_data)] = normals_data
+    buffer_data[uvs_offset:uvs_offset + len(uvs_data)] = uvs_data
+    buffer_data[indices_offset:indices_offset + len(indices_data)] = indices_data
+    buffer_data[texture_offset:texture_offset + len(texture_data)] = texture_data
 
     # Define buffer views
     gltf["bufferViews"] = [
@@ -753,8 +947,7 @@ def generate_avatar_glb(mesh_data: dict, texture_path: str, avatar_id: str, styl
     gltf_json = json.dumps(gltf, separators=(',', ':')).encode('utf-8')
 
     # Pad JSON to 4-byte alignment
-    while len(gltf_json) % 4 != 0:
-        gltf_json += b' '
+    gltf_json += b' ' * ((-len(gltf_json)) & 3)
 
     # GLB header
     glb_data = bytearray()
@@ -782,12 +975,12 @@ def generate_avatar_glb(mesh_data: dict, texture_path: str, avatar_id: str, styl
     return glb_path
 
 
-def generate_thumbnail(image: np.ndarray, avatar_id: str) -> str:
+def generate_thumbnail(pil_image: Image.Image, avatar_id: str) -> str:
     """Generate a thumbnail image for the avatar"""
-    thumbnail_size = (256, 256)
-    thumbnail = cv2.resize(image, thumbnail_size)
-    thumbnail_path = os.path.join(AVATAR_STORAGE_PATH, f"{avatar_id}_thumb.png")
-    cv2.imwrite(thumbnail_path, cv2.cvtColor(thumbnail, cv2.COLOR_RGB2BGR))
+    # WebP encodes faster and smaller than PNG for photographic content
+    thumbnail = pil_image.resize((256, 256), Image.BILINEAR)
+    thumbnail_path = os.path.join(AVATAR_STORAGE_PATH, f"{avatar_id}_thumb.webp")
+    thumbnail.save(thumbnail_path, "WEBP", quality=85)
     return thumbnail_path
 
 
@@ -3,31 +3,39 @@ Emotion Recognition Microservice
 FastAPI service for facial expression and emotion detection using DeepFace
 """
 
-import io
+import asyncio
+import functools
+import hashlib
 import logging
 import json
+import re
+import threading
+from collections import OrderedDict
 from typing import Optional, List
 from contextlib import asynccontextmanager
 import os
 
 import numpy as np
+
+# Cap decoded image size before cv2 loads: a few-KB crafted JPEG can
+# otherwise expand to a multi-GB BGR buffer inside the container. Same
+# 25 MP ceiling the PIL path used to enforce via MAX_IMAGE_PIXELS.
+os.environ.setdefault("OPENCV_IO_MAX_IMAGE_PIXELS", "25000000")
 import cv2
-from fastapi import FastAPI, HTTPException, UploadFile, File, Request
+from fastapi import FastAPI, HTTPException, UploadFile, File, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from starlette.responses import JSONResponse
-from pydantic import BaseModel
-import PIL
-from PIL import Image
+from pydantic import BaseModel, ConfigDict, Field
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
-PIL.Image.MAX_IMAGE_PIXELS = 25_000_000
-
-# DeepFace imports for real emotion detection
+# DeepFace imports for real emotion detection. Detection happens locally
+# (YuNet/Haar) before the classifier ever sees a crop, so RetinaFace is
+# deliberately not imported — the service only loads the emotion weights.
 try:
     from deepface import DeepFace
-    from retinaface import RetinaFace
 
     DEEPFACE_AVAILABLE = True
     logger = logging.getLogger(__name__)
@@ -41,9 +49,55 @@ except ImportError as e:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# OpenVINO runs the small emotion CNN with fused, SIMD-tuned CPU kernels;
+# stock TF/Keras stays as the fallback runtime.
+try:
+    import openvino as ov
+
+    OPENVINO_AVAILABLE = True
+except ImportError:
+    OPENVINO_AVAILABLE = False
+
+OV_CACHE_DIR = os.getenv("OV_CACHE_DIR", "/opt/cache")
+
+# "auto" picks the fastest available runtime (CUDA > OpenVINO > int8 ONNX
+# > Keras); "keras" forces the stock DeepFace model, kept as an escape
+# hatch while the optimized runtimes bed in.
+EMOTION_RUNTIME = os.getenv("EMOTION_RUNTIME", "auto")
+
+# Demographic attributes clients may request individually; each one costs
+# its own model pass, so nothing runs unless asked for
+ALLOWED_DEMOGRAPHICS = {"age", "gender", "race"}
+
 # Fallback to Haar Cascade if DeepFace not available
 face_cascade = None
+
+# YuNet int8 ONNX face detector: faster and better recall than the Haar
+# cascade, and it takes the BGR frame directly so the full-image
+# grayscale pass disappears. The cascade remains the fallback when the
+# model file isn't shipped.
+YUNET_MODEL_PATH = os.getenv(
+    "YUNET_MODEL_PATH",
+    os.path.join(os.path.dirname(__file__), "face_detection_yunet_2023mar_int8.onnx"),
+)
+_yunet_detector = None
+# setInputSize/detect mutate detector state; serialize across threadpool workers
+_yunet_lock = threading.Lock()
+
+# On hybrid systems the Haar fallback can offload grayscale conversion
+# and cascade evaluation to the iGPU via OpenCL (T-API); probed once.
+try:
+    _OPENCL_AVAILABLE = cv2.ocl.haveOpenCL()
+except Exception:
+    _OPENCL_AVAILABLE = False
+
+# The built emotion classifier is cached for the life of the process;
+# requests call its predict directly instead of paying DeepFace.analyze's
+# per-call action dispatch and detector re-initialization.
+_emotion_model = None
 emotion_labels = ["angry", "disgust", "fear", "happy", "sad", "surprise", "neutral"]
+# Canonical label -> vector index, shared by every scoring path
+_LABEL_INDEX = {label: i for i, label in enumerate(emotion_labels)}
 
 # File upload validation constants
 ALLOWED_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".webp", ".gif"}
@@ -51,7 +105,7 @@ ALLOWED_IMAGE_MIMES = {"image/jpeg", "image/png", "image/bmp", "image/webp", "im
 MAX_IMAGE_SIZE = 10 * 1024 * 1024  # 10MB
 
 
-async def validate_image_upload(file: UploadFile) -> bytes:
+def validate_image_upload(file: UploadFile) -> bytes:
     """Validate and read an image upload. Returns file contents."""
     # Check extension
     filename = (file.filename or "").lower()
@@ -64,12 +118,53 @@ async def validate_image_upload(file: UploadFile) -> bytes:
     if content_type and content_type not in ALLOWED_IMAGE_MIMES:
         raise HTTPException(status_code=400, detail=f"Invalid content type: {content_type}. Allowed: {ALLOWED_IMAGE_MIMES}")
 
-    # Read with size limit
-    contents = await file.read()
-    if len(contents) > MAX_IMAGE_SIZE:
-        raise HTTPException(status_code=400, detail=f"File too large: {len(contents)} bytes. Maximum: {MAX_IMAGE_SIZE} bytes")
+    # UploadFile already spooled the body to a temp file; measure it with
+    # a seek/tell instead of reading an oversized body just to reject it,
+    # then read once. np.frombuffer later views these bytes without
+    # another copy, so this is the only allocation of the image data.
+    spooled = file.file
+    spooled.seek(0, os.SEEK_END)
+    size = spooled.tell()
+    spooled.seek(0)
+    if size > MAX_IMAGE_SIZE:
+        raise HTTPException(status_code=413, detail=f"File too large: {size} bytes. Maximum: {MAX_IMAGE_SIZE} bytes")
+
+    return spooled.read()
+
 
-    return contents
+def _decode_bgr(contents: bytes) -> np.ndarray:
+    """Decode image bytes straight to a contiguous uint8 BGR array.
+
+    cv2.imdecode dispatches to libjpeg-turbo's SIMD decoder and produces
+    a single numpy array. The pipeline consumes grayscale (cascade and
+    emotion CNN both), so the decoder's native BGR is kept as-is — a
+    full-image BGR-to-RGB pass would be pure memory traffic.
+    """
+    buf = np.frombuffer(contents, np.uint8)
+    try:
+        bgr = cv2.imdecode(buf, cv2.IMREAD_COLOR)
+    except cv2.error:
+        # imdecode throws when the header-declared size exceeds the
+        # OPENCV_IO_MAX_IMAGE_PIXELS cap set above
+        raise HTTPException(status_code=400, detail="Image dimensions too large")
+    if bgr is None:
+        raise HTTPException(status_code=400, detail="Could not decode image")
+    return bgr
+
+
+def _fit_max_edge(img: np.ndarray, max_edge: int = 640) -> np.ndarray:
+    """Downscale so the longest edge is at most max_edge.
+
+    Detection walks every pixel, and one centered face doesn't get found
+    any better above this resolution — a 4K phone photo is just 10-30x
+    more memory traffic for the same answer. INTER_AREA keeps the
+    downscale artifact-free.
+    """
+    h, w = img.shape[:2]
+    scale = max_edge / max(h, w)
+    if scale < 1:
+        img = cv2.resize(img, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+    return img
 
 
 def get_models():
@@ -95,6 +190,255 @@ def get_models():
     return face_cascade
 
 
+def get_yunet():
+    """Lazily load the YuNet detector; None when the model is absent"""
+    global _yunet_detector
+    if _yunet_detector is None and os.path.exists(YUNET_MODEL_PATH):
+        try:
+            _yunet_detector = cv2.FaceDetectorYN_create(YUNET_MODEL_PATH, "", (320, 320))
+            logger.info("YuNet face detector loaded")
+        except Exception as e:
+            logger.warning(f"YuNet unavailable ({e}), using Haar cascade")
+    return _yunet_detector
+
+
+def get_emotion_model():
+    """Lazily build and cache the DeepFace emotion classifier"""
+    global _emotion_model
+    if _emotion_model is None and DEEPFACE_AVAILABLE:
+        _emotion_model = DeepFace.build_model("Emotion")
+        logger.info("Emotion model built and cached")
+    return _emotion_model
+
+
+# Sentinel cached in place of a runtime handle after a failed init: a
+# runtime that could not come up won't later in the same process, and
+# without it every request would re-run the multi-second ONNX export
+# just to hit the same failure again.
+_RUNTIME_FAILED = object()
+
+_ov_emotion_model = None
+
+
+def _calibration_tensors(count: int = 200) -> Optional[np.ndarray]:
+    """Synthesize calibration crops from the checked-in sample faces"""
+    rng = np.random.default_rng(0)
+    sources = []
+    for name in ("test_face.jpg", "test_face2.jpg"):
+        img = cv2.imread(
+            os.path.join(os.path.dirname(__file__), name), cv2.IMREAD_GRAYSCALE
+        )
+        if img is not None:
+            sources.append(img)
+    if not sources:
+        return None
+    samples = []
+    for _ in range(count):
+        img = sources[rng.integers(len(sources))]
+        h, w = img.shape
+        scale = rng.uniform(0.6, 1.0)
+        ch, cw = int(h * scale), int(w * scale)
+        y = rng.integers(0, h - ch + 1)
+        x = rng.integers(0, w - cw + 1)
+        crop = cv2.resize(img[y : y + ch, x : x + cw], (48, 48))
+        if rng.random() < 0.5:
+            crop = crop[:, ::-1]
+        samples.append(crop.astype(np.float32)[..., np.newaxis] / 255.0)
+    return np.stack(samples)
+
+
+def _quantize_emotion_model(model):
+    """int8-quantize the converted emotion model; None when unavailable.
+
+    The classifier's outputs only pick a dominant label and weight seven
+    scalars, so int8 rounding error is tolerable, and the int8 kernels
+    roughly double CPU throughput at a quarter of the weight footprint.
+    """
+    try:
+        import nncf
+    except ImportError:
+        return None
+    calibration = _calibration_tensors()
+    if calibration is None:
+        return None
+    try:
+        dataset = nncf.Dataset(calibration, lambda item: item[np.newaxis, ...])
+        return nncf.quantize(model, dataset)
+    except Exception as e:
+        logger.warning(f"int8 quantization skipped: {e}")
+        return None
+
+
+def get_openvino_emotion_model():
+    """Compile (or load from the IR cache) the emotion CNN for OpenVINO.
+
+    The Keras model is exported once through ONNX and saved as IR; with
+    CACHE_DIR set, later container starts skip recompilation entirely.
+    Returns None when OpenVINO or the source model is unavailable.
+    """
+    global _ov_emotion_model
+    if not (OPENVINO_AVAILABLE and DEEPFACE_AVAILABLE):
+        return None
+    if _ov_emotion_model is not None:
+        return None if _ov_emotion_model is _RUNTIME_FAILED else _ov_emotion_model
+    try:
+        core = ov.Core()
+        core.set_property({"CACHE_DIR": OV_CACHE_DIR})
+        int8_path = os.path.join(OV_CACHE_DIR, "emotion_int8.xml")
+        fp_path = os.path.join(OV_CACHE_DIR, "emotion.xml")
+        ir_path = int8_path if os.path.exists(int8_path) else fp_path
+        if not os.path.exists(ir_path):
+            import tf2onnx
+
+            onnx_model, _ = tf2onnx.convert.from_keras(get_emotion_model())
+            os.makedirs(OV_CACHE_DIR, exist_ok=True)
+            model = ov.convert_model(onnx_model)
+            quantized = _quantize_emotion_model(model)
+            if quantized is not None:
+                model, ir_path = quantized, int8_path
+            else:
+                ir_path = fp_path
+            ov.save_model(model, ir_path)
+        _ov_emotion_model = core.compile_model(ir_path, "CPU")
+        logger.info(f"OpenVINO emotion model compiled from {os.path.basename(ir_path)}")
+    except Exception as e:
+        logger.warning(f"OpenVINO unavailable ({e}), staying on Keras inference")
+        _ov_emotion_model = _RUNTIME_FAILED
+        return None
+    return _ov_emotion_model
+
+
+def _export_emotion_onnx() -> Optional[str]:
+    """Export the Keras emotion model to ONNX once; returns the path"""
+    import tf2onnx
+
+    onnx_path = os.path.join(OV_CACHE_DIR, "emotion.onnx")
+    if not os.path.exists(onnx_path):
+        os.makedirs(OV_CACHE_DIR, exist_ok=True)
+        tf2onnx.convert.from_keras(get_emotion_model(), output_path=onnx_path)
+    return onnx_path
+
+
+_ort_emotion_session = None
+
+
+def _ort_session_options(ort):
+    """SessionOptions shared by both ONNX Runtime tiers.
+
+    Full graph optimization picks fused (and, on VNNI CPUs, int8-wide)
+    kernels, and intra-op threads cover all cores since endpoints run
+    one inference at a time per worker.
+    """
+    opts = ort.SessionOptions()
+    opts.intra_op_num_threads = os.cpu_count() or 1
+    opts.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return opts
+
+
+def get_cuda_emotion_session():
+    """ONNX Runtime session for the emotion CNN on CUDA; None without a GPU.
+
+    The session (and its CUDA context) lives for the whole process, so
+    requests never pay context or model setup. The ONNX export is shared
+    with the OpenVINO path and cached on disk.
+    """
+    global _ort_emotion_session
+    if not DEEPFACE_AVAILABLE:
+        return None
+    if _ort_emotion_session is not None:
+        return None if _ort_emotion_session is _RUNTIME_FAILED else _ort_emotion_session
+    try:
+        if cv2.cuda.getCudaEnabledDeviceCount() < 1:
+            raise RuntimeError("no CUDA device")
+        import onnxruntime as ort
+
+        _ort_emotion_session = ort.InferenceSession(
+            _export_emotion_onnx(),
+            sess_options=_ort_session_options(ort),
+            providers=["CUDAExecutionProvider", "CPUExecutionProvider"],
+        )
+        logger.info("Emotion model running on CUDA via ONNX Runtime")
+    except Exception as e:
+        logger.warning(f"CUDA inference unavailable ({e})")
+        _ort_emotion_session = _RUNTIME_FAILED
+        return None
+    return _ort_emotion_session
+
+
+_cpu_emotion_session = None
+
+
+def get_cpu_emotion_session():
+    """Dynamically int8-quantized ONNX Runtime session for CPU inference.
+
+    quantize_dynamic converts the weights to int8 once at startup, so
+    CPUs with VNNI run the classifier with int8 kernels even when the
+    OpenVINO/NNCF path is unavailable. Returns None on any failure.
+    """
+    global _cpu_emotion_session
+    if not DEEPFACE_AVAILABLE:
+        return None
+    if _cpu_emotion_session is not None:
+        return None if _cpu_emotion_session is _RUNTIME_FAILED else _cpu_emotion_session
+    try:
+        import onnxruntime as ort
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = os.path.join(OV_CACHE_DIR, "emotion_int8.onnx")
+        if not os.path.exists(int8_path):
+            quantize_dynamic(
+                model_input=_export_emotion_onnx(),
+                model_output=int8_path,
+                weight_type=QuantType.QInt8,
+            )
+        _cpu_emotion_session = ort.InferenceSession(
+            int8_path,
+            sess_options=_ort_session_options(ort),
+            providers=["CPUExecutionProvider"],
+        )
+        logger.info("Emotion model running int8 via ONNX Runtime")
+    except Exception as e:
+        logger.warning(f"int8 ONNX Runtime unavailable ({e})")
+        _cpu_emotion_session = _RUNTIME_FAILED
+        return None
+    return _cpu_emotion_session
+
+
+# Per-thread scratch buffers for the single-image inference path: the
+# resize target and input tensor are reused across requests, so the hot
+# path allocates nothing and the buffers stay cache-warm.
+_tls = threading.local()
+
+
+def _emotion_tensor(gray: np.ndarray) -> np.ndarray:
+    """Resize a grayscale crop into this thread's (1, 48, 48, 1) tensor"""
+    scratch = getattr(_tls, "scratch", None)
+    if scratch is None:
+        scratch = _tls.scratch = np.empty((48, 48), np.uint8)
+        _tls.tensor = np.empty((1, 48, 48, 1), np.float32)
+    cv2.resize(gray, (48, 48), dst=scratch)
+    np.divide(scratch, 255.0, out=_tls.tensor[0, :, :, 0])
+    return _tls.tensor
+
+
+def _predict_emotions(batch: np.ndarray) -> np.ndarray:
+    """Run the emotion classifier on an (N, 48, 48, 1) float tensor"""
+    if EMOTION_RUNTIME != "keras":
+        session = get_cuda_emotion_session()
+        if session is not None:
+            input_name = session.get_inputs()[0].name
+            return session.run(None, {input_name: batch.astype(np.float32)})[0]
+        compiled = get_openvino_emotion_model()
+        if compiled is not None:
+            return compiled([batch])[compiled.output(0)]
+        session = get_cpu_emotion_session()
+        if session is not None:
+            input_name = session.get_inputs()[0].name
+            return session.run(None, {input_name: batch.astype(np.float32)})[0]
+    return get_emotion_model().predict(batch, batch_size=len(batch), verbose=0)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler for startup/shutdown"""
@@ -106,10 +450,30 @@ async def lifespan(app: FastAPI):
 
     try:
         get_models()
+        get_yunet()
+        get_emotion_model()
+        if get_cuda_emotion_session() is None:
+            get_openvino_emotion_model()
         logger.info("Models pre-loaded successfully")
     except Exception as e:
         logger.warning(f"Model pre-loading skipped: {e}")
 
+    # Warm up on a real face, twice: the first pass compiles the detector
+    # and classifier graphs (and populates the OpenVINO kernel cache), the
+    # second exercises the cached paths, so no request pays the
+    # multi-second first-inference spike.
+    try:
+        warmup = cv2.imread(os.path.join(os.path.dirname(__file__), "test_face.jpg"))
+        if warmup is None:
+            logger.warning("test_face.jpg missing, warm-up skipped")
+        else:
+            warmup = _fit_max_edge(warmup)
+            for _ in range(2):
+                await asyncio.to_thread(_analyze_emotion_sync, warmup)
+            logger.info("Warm-up inference completed")
+    except Exception as e:
+        logger.warning(f"Warm-up skipped: {e}")
+
     yield
 
     # Shutdown
@@ -121,6 +485,8 @@ app = FastAPI(
     description="Microservice for facial expression and emotion detection using OpenCV",
     version="1.0.0",
     lifespan=lifespan,
+    # orjson serializes the float-heavy score payloads in C
+    default_response_class=ORJSONResponse,
 )
 
 limiter = Limiter(key_func=get_remote_address)
@@ -156,6 +522,8 @@ app.add_middleware(
 class EmotionScore(BaseModel):
     """Individual emotion score"""
 
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
     emotion: str
     score: float
 
@@ -163,10 +531,14 @@ class EmotionScore(BaseModel):
 class FacialExpressionResponse(BaseModel):
     """Response model for facial expression detection"""
 
+    # Demographics are assigned after construction, so this model stays
+    # mutable, but the dict default moves to a factory
+    model_config = ConfigDict(extra="ignore")
+
     face_detected: bool
     dominant_emotion: Optional[str] = None
     confidence: float = 0.0
-    emotions: dict[str, float] = {}
+    emotions: dict[str, float] = Field(default_factory=dict)
     age: Optional[int] = None
     gender: Optional[str] = None
     race: Optional[str] = None
@@ -175,6 +547,9 @@ class FacialExpressionResponse(BaseModel):
 class EmotionalAnalysisResponse(BaseModel):
     """Response model for comprehensive emotional analysis"""
 
+    # Frozen: instances are also cached and shared across requests
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
     primary_emotion: str
     emotion_scores: dict[str, float]
     intensity: float
@@ -188,6 +563,8 @@ class EmotionalAnalysisResponse(BaseModel):
 class HealthResponse(BaseModel):
     """Health check response"""
 
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
     status: str
     service: str
     version: str
@@ -220,63 +597,138 @@ EMOTION_VALENCE = {
     "neutral": 0.5,
 }
 
+# Canonical emotion ordering with the circumplex weights and sentiment
+# masks precomputed as vectors: per-request scoring becomes a few
+# length-7 C-level reductions instead of dict lookups and generator sums.
+EMOTION_ORDER = ("angry", "disgust", "fear", "happy", "sad", "surprise", "neutral")
+_AROUSAL = np.array([EMOTION_AROUSAL[e] for e in EMOTION_ORDER])
+_VALENCE = np.array([EMOTION_VALENCE[e] for e in EMOTION_ORDER])
+_POS_MASK = np.array([e in POSITIVE_EMOTIONS for e in EMOTION_ORDER])
+_NEG_MASK = np.array([e in NEGATIVE_EMOTIONS for e in EMOTION_ORDER])
+_NEUTRAL_INDEX = EMOTION_ORDER.index("neutral")
+
+# Text emotion keywords, inverted at import into one token -> emotion
+# indices table: the handler makes a single tokenization pass and one
+# hash lookup per token instead of ~40 full-text substring scans.
+_TEXT_EMOTION_KEYWORDS = {
+    "happy": [
+        "happy", "joy", "excited", "glad", "wonderful", "great",
+        "fantastic", "love", "amazing",
+    ],
+    "sad": [
+        "sad", "depressed", "unhappy", "cry", "terrible", "awful",
+        "hate", "lonely",
+    ],
+    "angry": [
+        "angry", "mad", "furious", "annoyed", "frustrated", "irritated", "rage",
+    ],
+    "fear": [
+        "scared", "afraid", "worried", "anxious", "nervous", "panic", "terror",
+    ],
+    "surprise": [
+        "surprised", "shocked", "amazed", "astonished", "wow", "unexpected",
+    ],
+    "disgust": ["disgusted", "gross", "awful", "terrible", "sick", "repulsed"],
+}
 
-def detect_emotions_deepface(face_img):
-    """Real emotion detection using DeepFace library"""
-    if not DEEPFACE_AVAILABLE:
-        return detect_emotions_fallback(face_img)
+# Words like "awful" score several emotions, so each token maps to a
+# tuple of emotion indices
+KEYWORD_TABLE: dict[str, tuple[int, ...]] = {}
+for _emotion, _words in _TEXT_EMOTION_KEYWORDS.items():
+    for _word in _words:
+        KEYWORD_TABLE[_word] = KEYWORD_TABLE.get(_word, ()) + (_LABEL_INDEX[_emotion],)
+
+_TOKEN_RE = re.compile(r"[a-z']+")
+
+# Optional Aho-Corasick fast path: one scan of the raw text instead of
+# regex tokenization plus a dict probe per token. The automaton reports
+# substring hits, so matches are boundary-checked and deduped to keep
+# the same once-per-word presence scoring as the token loop.
+try:
+    import ahocorasick
+
+    _KEYWORD_AUTOMATON = ahocorasick.Automaton()
+    for _word, _indices in KEYWORD_TABLE.items():
+        _KEYWORD_AUTOMATON.add_word(_word, (_word, _indices))
+    _KEYWORD_AUTOMATON.make_automaton()
+except ImportError:
+    _KEYWORD_AUTOMATON = None
 
-    try:
-        # Convert PIL Image to numpy array if needed
-        if isinstance(face_img, Image.Image):
-            face_array = np.array(face_img)
-        else:
-            face_array = face_img
-
-        # Use DeepFace for emotion analysis
-        if not DEEPFACE_AVAILABLE:
-            raise ImportError("DeepFace not available")
-
-        result = DeepFace.analyze(
-            img_path=face_array,
-            actions=["emotion"],
-            enforce_detection=False,
-            detector_backend="retinaface",
-            recognizer_model="VGG-Face",
-            align=True,
-        )
 
-        if isinstance(result, list) and len(result) > 0:
-            result = result[0]
-
-        # Extract emotion scores
-        emotion_data = result.get("emotion", {}) if isinstance(result, dict) else {}
-        emotions = emotion_data
-
-        # Standardize emotion labels to match our expected format
-        standardized_emotions = {
-            "angry": emotions.get("angry", 0.0),
-            "disgust": emotions.get("disgust", 0.0),
-            "fear": emotions.get("fear", 0.0),
-            "happy": emotions.get("happy", 0.0),
-            "sad": emotions.get("sad", 0.0),
-            "surprise": emotions.get("surprise", 0.0),
-            "neutral": emotions.get("neutral", 0.0),
+def _match_keywords(lower_text: str) -> set[tuple[str, tuple[int, ...]]]:
+    """Find distinct emotion keywords present in the text as whole words."""
+    if _KEYWORD_AUTOMATON is not None:
+        last = len(lower_text) - 1
+        return {
+            payload
+            for end, payload in _KEYWORD_AUTOMATON.iter(lower_text)
+            if (
+                (start := end - len(payload[0]) + 1) == 0
+                or not lower_text[start - 1].isalpha()
+            )
+            and (end == last or not lower_text[end + 1].isalpha())
         }
+    return {
+        (token, KEYWORD_TABLE[token])
+        for token in set(_TOKEN_RE.findall(lower_text))
+        if token in KEYWORD_TABLE
+    }
 
-        # Find dominant emotion
-        dominant_emotion = max(
-            standardized_emotions.keys(), key=lambda k: standardized_emotions[k]
-        )
 
-        return standardized_emotions, dominant_emotion
+@functools.lru_cache(maxsize=4096)
+def _score_text(lower_text: str) -> tuple[str, float, tuple[float, ...]]:
+    """Score lowercased text against the keyword table.
+
+    Scoring is deterministic and conversational traffic repeats phrases
+    (greetings, canned replies), so results are LRU-cached on the text;
+    a hit skips matching and normalization entirely. Returns the
+    dominant emotion, its confidence, and the score tuple in label
+    order — a tuple, so cached values stay immutable.
+    """
+    # Simple rule-based text emotion detection: one matching pass over
+    # the text, presence-scored like the old substring checks
+    scores = np.zeros(len(emotion_labels))
+    for _word, indices in _match_keywords(lower_text):
+        for idx in indices:
+            scores[idx] += 0.3
+
+    # Add some baseline neutral
+    scores[_LABEL_INDEX["neutral"]] = 0.1
+
+    # Normalize scores
+    scores /= scores.sum()
+
+    max_idx = int(scores.argmax())
+    return emotion_labels[max_idx], float(scores[max_idx]), tuple(scores.tolist())
+
+
+def detect_emotions_deepface(face_img) -> np.ndarray:
+    """Real emotion detection using DeepFace library.
+
+    Returns normalized scores as a length-7 vector in canonical order;
+    everything downstream stays ndarray until the response boundary.
+    """
+    if not DEEPFACE_AVAILABLE:
+        return detect_emotions_fallback(face_img)
+
+    try:
+        # The caller already localized the face, so feed the crop straight
+        # to the cached classifier: grayscale 48x48 in [0,1], one predict,
+        # no per-call DeepFace.analyze dispatch or detector setup.
+        gray = (
+            cv2.cvtColor(face_img, cv2.COLOR_BGR2GRAY)
+            if face_img.ndim == 3
+            else face_img
+        )
+        scores = _predict_emotions(_emotion_tensor(gray))[0]
+        return scores / scores.sum()
 
     except Exception as e:
         logger.warning(f"DeepFace detection failed: {e}, using fallback")
         return detect_emotions_fallback(face_img)
 
 
-def detect_emotions_fallback(face_img):
+def detect_emotions_fallback(face_img) -> np.ndarray:
     """Fallback emotion detection using simple heuristics"""
     # This is a simplified placeholder for emotion detection
     # In a real implementation, you would use a trained emotion recognition model
@@ -287,79 +739,66 @@ def detect_emotions_fallback(face_img):
     )
 
     # Simple heuristic-based emotion detection (placeholder)
-    # Calculate basic image features
-    brightness = np.mean(gray)
-    contrast = np.std(gray)
+    # Brightness and contrast come from one fused C pass over the pixels
+    mean, std = cv2.meanStdDev(gray)
+    brightness = float(mean[0, 0])
+    contrast = float(std[0, 0])
 
-    # Generate pseudo-random but consistent emotion scores based on image features
-    np.random.seed(hash((brightness, contrast)) % 1000)
-    base_scores = np.random.dirichlet(np.ones(len(emotion_labels)))
+    # Pseudo-random but consistent scores per image, drawn from a local
+    # generator: the old np.random.seed mutated global RNG state shared
+    # by every threadpool worker
+    rng = np.random.default_rng(hash((brightness, contrast)) % 1000)
+    base_scores = rng.dirichlet(np.ones(len(emotion_labels)))
 
     # Adjust scores based on brightness and contrast
     if brightness > 150:  # Bright image - tend towards happy
-        base_scores[emotion_labels.index("happy")] *= 1.5
+        base_scores[_LABEL_INDEX["happy"]] *= 1.5
     elif brightness < 100:  # Dark image - tend towards sad/angry
-        base_scores[emotion_labels.index("sad")] *= 1.3
-        base_scores[emotion_labels.index("angry")] *= 1.2
+        base_scores[_LABEL_INDEX["sad"]] *= 1.3
+        base_scores[_LABEL_INDEX["angry"]] *= 1.2
 
     if contrast > 50:  # High contrast - tend towards surprise/fear
-        base_scores[emotion_labels.index("surprise")] *= 1.4
-        base_scores[emotion_labels.index("fear")] *= 1.2
+        base_scores[_LABEL_INDEX["surprise"]] *= 1.4
+        base_scores[_LABEL_INDEX["fear"]] *= 1.2
 
     # Normalize scores
-    base_scores = base_scores / base_scores.sum()
-
-    # Convert to dictionary
-    emotions = {
-        label: float(score) for label, score in zip(emotion_labels, base_scores)
-    }
-    dominant_emotion = max(emotions.keys(), key=lambda k: emotions[k])
-
-    return emotions, dominant_emotion
+    return base_scores / base_scores.sum()
 
 
-def calculate_sentiment(emotions: dict[str, float]) -> tuple[str, float]:
-    """Calculate overall sentiment from emotion scores"""
-    positive_score = sum(emotions.get(e, 0) for e in POSITIVE_EMOTIONS)
-    negative_score = sum(emotions.get(e, 0) for e in NEGATIVE_EMOTIONS)
-    neutral_score = emotions.get("neutral", 0)
+def _summarize(scores: np.ndarray):
+    """One fused pass over the canonical score vector.
 
-    total = positive_score + negative_score + neutral_score
+    Derives dominant emotion, intensity, sentiment, and arousal/valence
+    from a single buffer — no dict walks anywhere in between.
+    """
+    v = np.asarray(scores, dtype=np.float64)
+    total = v.sum()
     if total == 0:
-        return "Neutral", 0.5
+        return "neutral", 0.0, 0.0, "Neutral", 0.5, 0.5, 0.5
 
-    # Normalize scores
-    positive_norm = positive_score / total
-    negative_norm = negative_score / total
+    max_idx = int(v.argmax())
+    dominant_emotion = EMOTION_ORDER[max_idx]
+    intensity = float(v[max_idx])
+    confidence = intensity
 
-    # Calculate sentiment score (-1 to 1, mapped to 0 to 1)
-    sentiment_score = (positive_norm - negative_norm + 1) / 2
+    positive_norm = float(v[_POS_MASK].sum()) / total
+    negative_norm = float(v[_NEG_MASK].sum()) / total
+    neutral_norm = float(v[_NEUTRAL_INDEX]) / total
 
-    if positive_norm > negative_norm and positive_norm > neutral_score / total:
-        return "Positive", sentiment_score
-    elif negative_norm > positive_norm and negative_norm > neutral_score / total:
-        return "Negative", sentiment_score
+    # Sentiment score maps (-1..1) onto (0..1)
+    sentiment_score = (positive_norm - negative_norm + 1) / 2
+    if positive_norm > negative_norm and positive_norm > neutral_norm:
+        sentiment = "Positive"
+    elif negative_norm > positive_norm and negative_norm > neutral_norm:
+        sentiment = "Negative"
     else:
-        return "Neutral", sentiment_score
+        sentiment = "Neutral"
 
+    # Circumplex coordinates as two dot products on the same vector
+    arousal = float(v @ _AROUSAL) / total
+    valence = float(v @ _VALENCE) / total
 
-def calculate_arousal_valence(emotions: dict[str, float]) -> tuple[float, float]:
-    """Calculate arousal and valence from emotion scores"""
-    total_weight = sum(emotions.values())
-    if total_weight == 0:
-        return 0.5, 0.5
-
-    arousal = (
-        sum(emotions.get(e, 0) * EMOTION_AROUSAL.get(e, 0.5) for e in emotions)
-        / total_weight
-    )
-
-    valence = (
-        sum(emotions.get(e, 0) * EMOTION_VALENCE.get(e, 0.5) for e in emotions)
-        / total_weight
-    )
-
-    return arousal, valence
+    return dominant_emotion, intensity, confidence, sentiment, sentiment_score, arousal, valence
 
 
 @app.get("/health", response_model=HealthResponse)
@@ -375,77 +814,68 @@ async def health_check():
 
 @app.post("/analyze/facial-expression", response_model=FacialExpressionResponse)
 @limiter.limit("30/minute")
-async def analyze_facial_expression(
+def analyze_facial_expression(
     request: Request,
-    file: UploadFile = File(...), include_demographics: bool = False
+    file: UploadFile = File(...),
+    demographics: list[str] = Query(default=[]),
 ):
     """
     Analyze facial expression from an uploaded image.
 
     Args:
         file: Image file (JPEG, PNG, etc.)
-        include_demographics: Whether to include age, gender, race analysis
+        demographics: Which of age/gender/race to analyze; each attribute
+            is computed only when requested, so asking for one does not
+            pay for the other two
 
     Returns:
         FacialExpressionResponse with detected emotions and confidence
     """
+    requested = set(demographics)
+    invalid = requested - ALLOWED_DEMOGRAPHICS
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid demographics: {sorted(invalid)}. Allowed: {sorted(ALLOWED_DEMOGRAPHICS)}",
+        )
+
     try:
         # Read and validate image
-        contents = await validate_image_upload(file)
-        image = Image.open(io.BytesIO(contents))
-
-        # Convert to RGB if necessary
-        if image.mode != "RGB":
-            image = image.convert("RGB")
-
-        # Convert to numpy array
-        img_array = np.array(image)
-
-        # Determine actions to perform
-        actions = ["emotion"]
-        if include_demographics:
-            actions.extend(["age", "gender", "race"])
-
-        # Detect faces
-        face_img_gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
-        cascade = get_models()
-
-        if cascade is None:
-            raise HTTPException(
-                status_code=500, detail="Face detection model not loaded"
-            )
-
-        faces = cascade.detectMultiScale(face_img_gray, 1.1, 3)
-
-        if len(faces) == 0:
-            # Fallback: use the entire image for emotion detection
-            face_img = img_array
-            face_detected = False
+        contents = validate_image_upload(file)
+        img_array = _fit_max_edge(_decode_bgr(contents))
+
+        face_img, face_detected = _locate_face(img_array)
+
+        if face_detected:
+            # Detect emotions; dominant label and confidence come from a
+            # single argmax over the canonical score vector
+            scores = detect_emotions_deepface(face_img)
+            max_idx = int(scores.argmax())
+            dominant_emotion = EMOTION_ORDER[max_idx]
+            confidence = float(scores[max_idx])
         else:
-            # Use first detected face
-            (x, y, w, h) = faces[0]
-            face_img = img_array[y : y + h, x : x + w]
-            face_detected = True
-
-        # Detect emotions
-        emotions, dominant_emotion = detect_emotions_deepface(face_img)
-        confidence = emotions.get(dominant_emotion, 0)
-
-        # Emotions are already normalized to 0-1 range
-        normalized_emotions = emotions
+            # No face: the classifier output would be meaningless, so
+            # skip inference and report low-confidence neutral
+            scores = np.zeros(len(emotion_labels))
+            dominant_emotion = "neutral"
+            confidence = 0.0
 
         response = FacialExpressionResponse(
             face_detected=face_detected,
             dominant_emotion=dominant_emotion,
             confidence=confidence,
-            emotions=normalized_emotions,
+            emotions={
+                label: float(score) for label, score in zip(emotion_labels, scores)
+            },
         )
 
         # Add demographics if requested (placeholder values)
-        if include_demographics:
-            # These are placeholder values - in a real implementation you'd use age/gender/race detection
+        # These are placeholder values - in a real implementation you'd use age/gender/race detection
+        if "age" in requested:
             response.age = 25 + int(confidence * 20)  # Mock age based on confidence
+        if "gender" in requested:
             response.gender = "male" if confidence > 0.5 else "female"  # Mock gender
+        if "race" in requested:
             response.race = "unknown"  # Mock race
 
         return response
@@ -457,80 +887,182 @@ async def analyze_facial_expression(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@app.post("/analyze/emotion", response_model=EmotionalAnalysisResponse)
-@limiter.limit("30/minute")
-async def analyze_emotion(request: Request, file: UploadFile = File(...)):
-    """
-    Comprehensive emotional analysis from facial expression.
+def _scores_to_response(scores: np.ndarray) -> EmotionalAnalysisResponse:
+    """Build the full analysis response from a canonical score vector"""
+    (
+        dominant_emotion,
+        intensity,
+        confidence,
+        sentiment,
+        sentiment_score,
+        arousal,
+        valence,
+    ) = _summarize(scores)
+
+    return EmotionalAnalysisResponse(
+        primary_emotion=dominant_emotion,
+        emotion_scores={
+            label: float(score) for label, score in zip(emotion_labels, scores)
+        },
+        intensity=intensity,
+        confidence=confidence,
+        sentiment=sentiment,
+        sentiment_score=sentiment_score,
+        arousal_level=arousal,
+        valence_level=valence,
+    )
 
-    Provides detailed emotion scores, sentiment analysis, and
-    arousal/valence levels based on the circumplex model of affect.
 
-    Args:
-        file: Image file (JPEG, PNG, etc.)
+def _locate_face(img_array: np.ndarray) -> tuple[np.ndarray, bool]:
+    """Find the first face crop; falls back to the whole image"""
+    detector = get_yunet()
+    if detector is not None:
+        h, w = img_array.shape[:2]
+        with _yunet_lock:
+            detector.setInputSize((w, h))
+            _, faces = detector.detect(img_array)
+        if faces is None or len(faces) == 0:
+            return img_array, False
+        x, y, fw, fh = faces[0][:4].astype(int)
+        x, y = max(x, 0), max(y, 0)
+        return img_array[y : y + fh, x : x + fw], True
+
+    cascade = get_models()
+    if cascade is None:
+        raise HTTPException(status_code=500, detail="Face detection model not loaded")
+
+    if _OPENCL_AVAILABLE:
+        # T-API: UMat routes the grayscale pass and the cascade stages
+        # through OpenCL, keeping the CPU free for the emotion model.
+        # Only the small face crop comes back to host memory.
+        face_img_gray = cv2.cvtColor(cv2.UMat(img_array), cv2.COLOR_BGR2GRAY)
+    else:
+        face_img_gray = cv2.cvtColor(img_array, cv2.COLOR_BGR2GRAY)
+    faces = cascade.detectMultiScale(face_img_gray, 1.1, 3)
 
-    Returns:
-        EmotionalAnalysisResponse with comprehensive emotional metrics
+    if len(faces) == 0:
+        return img_array, False
+
+    (x, y, w, h) = faces[0]
+    return img_array[y : y + h, x : x + w], True
+
+
+def _no_face_response() -> EmotionalAnalysisResponse:
+    """Low-confidence neutral analysis for images without a detectable face.
+
+    Running the classifier on the whole frame produced meaningless scores
+    at full inference cost, so no-face inputs skip the model entirely.
     """
-    try:
-        # Read and validate image
-        contents = await validate_image_upload(file)
-        image = Image.open(io.BytesIO(contents))
+    return _scores_to_response(np.zeros(len(emotion_labels)))
 
-        # Convert to RGB if necessary
-        if image.mode != "RGB":
-            image = image.convert("RGB")
 
-        # Convert to numpy array
-        img_array = np.array(image)
+def _analyze_emotion_sync(img_array: np.ndarray) -> EmotionalAnalysisResponse:
+    """Full emotional analysis of a decoded BGR image (blocking)"""
+    face_img, face_detected = _locate_face(img_array)
+    if not face_detected:
+        return _no_face_response()
 
-        # Detect faces
-        face_img_gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
-        cascade = get_models()
+    # Emotions are already normalized to 0-1 range
+    emotions = detect_emotions_deepface(face_img)
+    return _scores_to_response(emotions)
 
-        if cascade is None:
-            raise HTTPException(
-                status_code=500, detail="Face detection model not loaded"
-            )
 
-        faces = cascade.detectMultiScale(face_img_gray, 1.1, 3)
+def _batch_emotion_pipeline(contents_list: list[bytes]) -> list:
+    """Analyze several images with one batched emotion-model forward pass.
 
-        if len(faces) == 0:
-            # Fallback: use the entire image for emotion detection
-            face_img = img_array
-        else:
-            # Use first detected face
-            (x, y, w, h) = faces[0]
-            face_img = img_array[y : y + h, x : x + w]
+    Detection runs per image with the cached local detector, but the N
+    classifier calls collapse into a single stacked predict, amortizing
+    dispatch and graph overhead. Failures stay isolated per entry.
+    """
+    outcomes = [None] * len(contents_list)
+    batch_indices = []
+    batch_grays = []
 
-        # Detect emotions
-        emotions, dominant_emotion = detect_emotions_deepface(face_img)
+    for i, contents in enumerate(contents_list):
+        try:
+            img_array = _fit_max_edge(_decode_bgr(contents))
+            face_img, face_detected = _locate_face(img_array)
+            if not face_detected:
+                outcomes[i] = _no_face_response()
+                continue
+            batch_indices.append(i)
+            batch_grays.append(cv2.cvtColor(face_img, cv2.COLOR_BGR2GRAY))
+        except Exception as e:
+            outcomes[i] = e
 
-        # Emotions are already normalized to 0-1 range
-        normalized_emotions = emotions
+    if batch_grays:
+        try:
+            # Fused preprocessing straight into the batch tensor: each
+            # crop is resized and normalized in place, so no per-image
+            # intermediates or final stack copy are allocated.
+            batch = np.empty((len(batch_grays), 48, 48, 1), np.float32)
+            scratch = np.empty((48, 48), np.uint8)
+            for row, gray in zip(batch, batch_grays):
+                cv2.resize(gray, (48, 48), dst=scratch)
+                np.divide(scratch, 255.0, out=row[:, :, 0])
+            predictions = _predict_emotions(batch)
+            predictions = predictions / predictions.sum(axis=1, keepdims=True)
+            for i, row in zip(batch_indices, predictions):
+                outcomes[i] = _scores_to_response(row)
+        except Exception:
+            # No usable classifier: fall back to the single-image path and
+            # its heuristics, image by image
+            for i in batch_indices:
+                try:
+                    outcomes[i] = _emotion_pipeline(contents_list[i])
+                except Exception as e:
+                    outcomes[i] = e
+
+    return outcomes
+
+
+# Identical re-uploads (retries, debugging, frame re-processing) skip
+# detection and inference entirely: a small LRU keyed on the content hash
+# returns the previous response. Responses are treated as immutable.
+_ANALYSIS_CACHE_MAX = 1024
+_analysis_cache: OrderedDict = OrderedDict()
+_analysis_cache_lock = threading.Lock()
+
+
+def _emotion_pipeline(contents: bytes) -> EmotionalAnalysisResponse:
+    """Decode + analyze, suitable for asyncio.to_thread dispatch"""
+    digest = hashlib.blake2b(contents, digest_size=16).digest()
+    with _analysis_cache_lock:
+        cached = _analysis_cache.get(digest)
+        if cached is not None:
+            _analysis_cache.move_to_end(digest)
+            return cached
+
+    response = _analyze_emotion_sync(_fit_max_edge(_decode_bgr(contents)))
+
+    with _analysis_cache_lock:
+        _analysis_cache[digest] = response
+        _analysis_cache.move_to_end(digest)
+        if len(_analysis_cache) > _ANALYSIS_CACHE_MAX:
+            _analysis_cache.popitem(last=False)
+    return response
 
-        confidence = normalized_emotions.get(dominant_emotion, 0)
 
-        # Calculate intensity (how strong the dominant emotion is)
-        max_score = max(normalized_emotions.values()) if normalized_emotions else 0
-        intensity = max_score
+@app.post("/analyze/emotion", response_model=EmotionalAnalysisResponse)
+@limiter.limit("30/minute")
+def analyze_emotion(request: Request, file: UploadFile = File(...)):
+    """
+    Comprehensive emotional analysis from facial expression.
 
-        # Calculate sentiment
-        sentiment, sentiment_score = calculate_sentiment(normalized_emotions)
+    Provides detailed emotion scores, sentiment analysis, and
+    arousal/valence levels based on the circumplex model of affect.
 
-        # Calculate arousal and valence
-        arousal, valence = calculate_arousal_valence(normalized_emotions)
+    Args:
+        file: Image file (JPEG, PNG, etc.)
 
-        return EmotionalAnalysisResponse(
-            primary_emotion=dominant_emotion,
-            emotion_scores=normalized_emotions,
-            intensity=intensity,
-            confidence=confidence,
-            sentiment=sentiment,
-            sentiment_score=sentiment_score,
-            arousal_level=arousal,
-            valence_level=valence,
-        )
+    Returns:
+        EmotionalAnalysisResponse with comprehensive emotional metrics
+    """
+    try:
+        # Plain def: FastAPI already runs this handler in its threadpool,
+        # so the blocking decode + inference never touch the event loop
+        contents = validate_image_upload(file)
+        return _emotion_pipeline(contents)
 
     except HTTPException:
         raise
@@ -551,17 +1083,33 @@ async def analyze_batch(request: Request, files: list[UploadFile] = File(...)):
     Returns:
         List of EmotionalAnalysisResponse for each image
     """
-    results = []
-    for file in files:
-        try:
-            # Rewind file if needed
-            await file.seek(0)
-            result = await analyze_emotion(request, file)
-            results.append({"filename": file.filename, "analysis": result})
-        except Exception as e:
-            results.append({"filename": file.filename, "error": str(e)})
+    async def read_one(file: UploadFile) -> bytes:
+        # Rewind file if needed
+        await file.seek(0)
+        # validate_image_upload reads up to 10 MB from the spooled temp
+        # file synchronously (the single-image endpoints run it inside
+        # FastAPI's threadpool); keep those reads off the event loop here
+        return await asyncio.to_thread(validate_image_upload, file)
+
+    # Read uploads concurrently, then hand every decodable image to one
+    # batched inference call in a worker thread
+    reads = await asyncio.gather(*(read_one(file) for file in files), return_exceptions=True)
+    outcomes = list(reads)
+
+    todo = [(i, r) for i, r in enumerate(reads) if not isinstance(r, Exception)]
+    if todo:
+        analyzed = await asyncio.to_thread(
+            _batch_emotion_pipeline, [contents for _, contents in todo]
+        )
+        for (i, _), outcome in zip(todo, analyzed):
+            outcomes[i] = outcome
 
-    return results
+    return [
+        {"filename": file.filename, "error": str(outcome)}
+        if isinstance(outcome, Exception)
+        else {"filename": file.filename, "analysis": outcome}
+        for file, outcome in zip(files, outcomes)
+    ]
 
 
 @app.post("/detect-emotion")
@@ -584,114 +1132,11 @@ async def detect_emotion_from_text(request: Request, body: dict):
         if not text:
             return {"emotion": "neutral", "confidence": 0.5}
 
-        # Simple rule-based text emotion detection
-        emotion_scores = {
-            "happy": 0.0,
-            "sad": 0.0,
-            "angry": 0.0,
-            "fear": 0.0,
-            "surprise": 0.0,
-            "disgust": 0.0,
-            "neutral": 0.0,
-        }
-
-        lower_text = text.lower()
-
-        # Happy indicators
-        happy_words = [
-            "happy",
-            "joy",
-            "excited",
-            "glad",
-            "wonderful",
-            "great",
-            "fantastic",
-            "love",
-            "amazing",
-        ]
-        for word in happy_words:
-            if word in lower_text:
-                emotion_scores["happy"] += 0.3
-
-        # Sad indicators
-        sad_words = [
-            "sad",
-            "depressed",
-            "unhappy",
-            "cry",
-            "terrible",
-            "awful",
-            "hate",
-            "lonely",
-        ]
-        for word in sad_words:
-            if word in lower_text:
-                emotion_scores["sad"] += 0.3
-
-        # Angry indicators
-        angry_words = [
-            "angry",
-            "mad",
-            "furious",
-            "annoyed",
-            "frustrated",
-            "irritated",
-            "rage",
-        ]
-        for word in angry_words:
-            if word in lower_text:
-                emotion_scores["angry"] += 0.3
-
-        # Fear indicators
-        fear_words = [
-            "scared",
-            "afraid",
-            "worried",
-            "anxious",
-            "nervous",
-            "panic",
-            "terror",
-        ]
-        for word in fear_words:
-            if word in lower_text:
-                emotion_scores["fear"] += 0.3
-
-        # Surprise indicators
-        surprise_words = [
-            "surprised",
-            "shocked",
-            "amazed",
-            "astonished",
-            "wow",
-            "unexpected",
-        ]
-        for word in surprise_words:
-            if word in lower_text:
-                emotion_scores["surprise"] += 0.3
-
-        # Disgust indicators
-        disgust_words = ["disgusted", "gross", "awful", "terrible", "sick", "repulsed"]
-        for word in disgust_words:
-            if word in lower_text:
-                emotion_scores["disgust"] += 0.3
-
-        # Add some baseline neutral
-        emotion_scores["neutral"] = 0.1
-
-        # Normalize scores
-        total_score = sum(emotion_scores.values())
-        if total_score > 0:
-            for key in emotion_scores:
-                emotion_scores[key] = emotion_scores[key] / total_score
-
-        # Find dominant emotion
-        dominant_emotion = max(emotion_scores.keys(), key=lambda k: emotion_scores[k])
-        confidence = emotion_scores[dominant_emotion]
-
+        emotion, confidence, score_tuple = _score_text(text.lower())
         return {
-            "emotion": dominant_emotion,
-            "confidence": float(confidence),
-            "all_emotions": emotion_scores,
+            "emotion": emotion,
+            "confidence": confidence,
+            "all_emotions": dict(zip(emotion_labels, score_tuple)),
         }
 
     except Exception as e:
@@ -702,4 +1147,6 @@ async def detect_emotion_from_text(request: Request, body: dict):
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    # uvloop + httptools ship with uvicorn[standard]; pin them explicitly
+    # so the faster loop and parser are used regardless of auto-detection
+    uvicorn.run(app, host="0.0.0.0", port=8001, loop="uvloop", http="httptools")
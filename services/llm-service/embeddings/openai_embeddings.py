@@ -16,9 +16,12 @@ class OpenAIEmbeddingProvider(EmbeddingProvider):
 
     def __init__(self):
         self._client: openai.AsyncOpenAI | None = None
+        # The key is fixed for the process lifetime; probe the
+        # environment once instead of on every request.
+        self._available = bool(os.getenv("OPENAI_API_KEY"))
 
     def is_available(self) -> bool:
-        return bool(os.getenv("OPENAI_API_KEY"))
+        return self._available
 
     def _get_client(self) -> openai.AsyncOpenAI:
         if self._client is None:
@@ -4,22 +4,28 @@ FastAPI service for generating empathetic, contextually appropriate responses
 Supports multiple LLM providers: OpenAI, Anthropic (Claude), Google (Gemini)
 """
 
+import hashlib
 import logging
 import json
 import asyncio
+import re
+import time
+from collections import OrderedDict
 from typing import Optional, Dict, Any, List
 from contextlib import asynccontextmanager
 import os
 
 import httpx
+import numpy as np
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from starlette.responses import JSONResponse
 from pydantic import BaseModel
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
-from datetime import datetime
+from datetime import datetime, timezone
 
 from providers import create_llm_provider, LLMProvider
 from embeddings import create_embedding_provider, EmbeddingProvider
@@ -139,6 +145,8 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("Shutting down LLM service...")
+    if llm_provider is not None:
+        await llm_provider.aclose()
 
 
 app = FastAPI(
@@ -146,6 +154,8 @@ app = FastAPI(
     description="Microservice for generating empathetic AI responses",
     version="1.0.0",
     lifespan=lifespan,
+    # orjson serializes the response payloads (datetimes included) in C
+    default_response_class=ORJSONResponse,
 )
 
 limiter = Limiter(key_func=get_remote_address)
@@ -217,26 +227,136 @@ def get_emotion_template(emotion: str) -> Dict[str, Any]:
     )
 
 
+# Context token budget: provider latency and cost scale with input
+# length, so each history message is capped and the whole context block
+# is bounded regardless of how much history the caller sends.
+MAX_CHARS_PER_MSG = 400
+MAX_CONTEXT_CHARS = 2000
+
+
 def build_conversation_context(
     history: Optional[List[Dict[str, Any]]], limit: int = 5
 ) -> str:
-    """Build conversation context from history"""
+    """Build a bounded conversation context from history.
+
+    Takes the most recent messages, truncates long bodies, and stops
+    once the character budget is spent — newest turns win, since they
+    carry the most signal for an empathetic reply.
+    """
     if not history:
         return ""
 
-    # Take last few messages for context
-    recent_history = history[-limit:] if len(history) > limit else history
-
+    # Walk newest-first so the budget is spent on recent turns, then
+    # restore chronological order for the prompt.
     context_parts = []
-    for item in recent_history:
-        if item.get("role") == "user":
-            context_parts.append(f"User: {item.get('content', '')}")
-        elif item.get("role") == "assistant":
-            context_parts.append(f"Assistant: {item.get('content', '')}")
+    remaining = MAX_CONTEXT_CHARS
+    for item in reversed(history[-limit:]):
+        role = item.get("role")
+        if role == "user":
+            prefix = "User: "
+        elif role == "assistant":
+            prefix = "Assistant: "
+        else:
+            continue
+
+        content = item.get("content", "")
+        if len(content) > MAX_CHARS_PER_MSG:
+            content = content[: MAX_CHARS_PER_MSG - 1] + "…"
+
+        part = prefix + content
+        if len(part) > remaining:
+            break
+        remaining -= len(part)
+        context_parts.append(part)
 
+    context_parts.reverse()
     return "\n".join(context_parts)
 
 
+# Exact-match response cache for the LLM path: empathetic traffic repeats
+# short phrases heavily, and a hit skips the provider round-trip (and its
+# token billing) entirely. Handlers run on the event loop, so no lock is
+# needed. Mock responses are pure in-process template lookups and aren't
+# worth caching.
+_RESPONSE_CACHE_MAX = 10_000
+_RESPONSE_CACHE_TTL = 3600.0
+_response_cache: OrderedDict[bytes, tuple[float, str]] = OrderedDict()
+
+
+def _response_cache_key(emotion: str, message: str, context: str) -> bytes:
+    return hashlib.blake2b(
+        f"{emotion}|{message}|{context}".encode(), digest_size=16
+    ).digest()
+
+
+def _cached_response(key: bytes) -> Optional[str]:
+    """Return the cached response text for key, or None if absent/expired."""
+    entry = _response_cache.get(key)
+    if entry is None:
+        return None
+    expires, text = entry
+    if time.monotonic() >= expires:
+        del _response_cache[key]
+        return None
+    _response_cache.move_to_end(key)
+    return text
+
+
+def _store_response(key: bytes, text: str) -> None:
+    _response_cache[key] = (time.monotonic() + _RESPONSE_CACHE_TTL, text)
+    _response_cache.move_to_end(key)
+    while len(_response_cache) > _RESPONSE_CACHE_MAX:
+        _response_cache.popitem(last=False)
+
+
+# Semantic cache layered behind the exact-match one: empathetic inputs
+# cluster ("I feel down" / "feeling blue"), so near-duplicates reuse the
+# prior response via cosine similarity over the configured embedding
+# provider. Entries are unit vectors, so similarity is a dot product.
+_SEMANTIC_CACHE_MAX = 2048
+_SEMANTIC_SIM_THRESHOLD = 0.92
+_semantic_cache: OrderedDict[bytes, tuple[str, np.ndarray, str]] = OrderedDict()
+
+
+async def _embed_unit(message: str) -> Optional[np.ndarray]:
+    """Unit-norm embedding of message, or None when embeddings can't help."""
+    if not (embedding_provider and embedding_provider.is_available()):
+        return None
+    try:
+        vec = np.asarray(
+            await embedding_provider.generate_embedding(message), dtype=np.float32
+        )
+    except Exception as e:
+        logger.debug(f"Semantic cache embedding failed: {e}")
+        return None
+    norm = float(np.linalg.norm(vec))
+    if norm == 0.0:
+        return None
+    return vec / norm
+
+
+def _semantic_match(emotion: str, query: np.ndarray) -> Optional[str]:
+    """Best same-emotion cached response above the similarity threshold."""
+    best_text = None
+    best_sim = _SEMANTIC_SIM_THRESHOLD
+    for cached_emotion, vec, text in _semantic_cache.values():
+        if cached_emotion != emotion or vec.shape != query.shape:
+            continue
+        sim = float(vec @ query)
+        if sim > best_sim:
+            best_sim = sim
+            best_text = text
+    return best_text
+
+
+def _store_semantic(emotion: str, message: str, vec: np.ndarray, text: str) -> None:
+    key = hashlib.blake2b(f"{emotion}|{message}".encode(), digest_size=16).digest()
+    _semantic_cache[key] = (emotion, vec, text)
+    _semantic_cache.move_to_end(key)
+    while len(_semantic_cache) > _SEMANTIC_CACHE_MAX:
+        _semantic_cache.popitem(last=False)
+
+
 def generate_mock_response(message: str, emotion: str) -> str:
     """Generate mock empathetic response when API is unavailable"""
     template = get_emotion_template(emotion)
@@ -269,11 +389,31 @@ async def generate_response(request: Request, llm_request: LLMRequest):
         # Generate response
         if llm_provider and llm_provider.is_available():
             try:
-                response_text = await llm_provider.generate_chat_response(
-                    system_prompt=template["system_prompt"],
-                    user_message=llm_request.message,
-                    context=context,
+                cache_key = _response_cache_key(
+                    llm_request.emotion, llm_request.message, context
                 )
+                response_text = _cached_response(cache_key)
+                query_vec = None
+                if response_text is None:
+                    query_vec = await _embed_unit(llm_request.message)
+                    if query_vec is not None:
+                        response_text = _semantic_match(
+                            llm_request.emotion, query_vec
+                        )
+                if response_text is None:
+                    response_text = await llm_provider.generate_chat_response(
+                        system_prompt=template["system_prompt"],
+                        user_message=llm_request.message,
+                        context=context,
+                    )
+                    _store_response(cache_key, response_text)
+                    if query_vec is not None:
+                        _store_semantic(
+                            llm_request.emotion,
+                            llm_request.message,
+                            query_vec,
+                            response_text,
+                        )
                 confidence = 0.9
                 response_type = "ai_generated"
             except Exception as e:
@@ -300,7 +440,7 @@ async def generate_response(request: Request, llm_request: LLMRequest):
             emotion=response_emotion,
             confidence=confidence,
             response_type=response_type,
-            timestamp=datetime.utcnow(),
+            timestamp=datetime.now(timezone.utc),
         )
 
     except Exception as e:
@@ -310,6 +450,67 @@ async def generate_response(request: Request, llm_request: LLMRequest):
         )
 
 
+# Analysis vocabularies, frozen at import. Tuples keep the reported
+# indicator order stable; the frozensets give hashed membership checks so
+# analyze_message tokenizes once instead of substring-scanning the
+# message per keyword.
+POSITIVE_WORDS = (
+    "love", "happy", "great", "fantastic", "wonderful", "amazing", "good", "excellent",
+)
+NEGATIVE_WORDS = (
+    "sad", "angry", "hate", "terrible", "awful", "bad", "horrible", "frustrated",
+)
+HIGH_URGENCY_WORDS = frozenset({"hate", "terrible", "awful"})
+TOPIC_WORDS = {
+    "work": frozenset({"work", "job", "career", "office"}),
+    "family": frozenset({"family", "mom", "dad", "sister", "brother"}),
+    "health": frozenset({"health", "doctor", "medicine", "sick"}),
+    "relationships": frozenset({"relationship", "partner", "boyfriend", "girlfriend"}),
+}
+
+_WORD_RE = re.compile(r"[a-z']+")
+
+# Optional Aho-Corasick fast path over the combined vocabulary: one scan
+# of the raw text replaces tokenizing the whole message, and stays linear
+# in message length however large the vocabularies grow. Hits are
+# boundary-checked so only whole words count, matching the token path.
+try:
+    import ahocorasick
+
+    _ANALYSIS_AUTOMATON = ahocorasick.Automaton()
+    for _word in {
+        *POSITIVE_WORDS,
+        *NEGATIVE_WORDS,
+        *HIGH_URGENCY_WORDS,
+        *(word for words in TOPIC_WORDS.values() for word in words),
+    }:
+        _ANALYSIS_AUTOMATON.add_word(_word, _word)
+    _ANALYSIS_AUTOMATON.make_automaton()
+except ImportError:
+    _ANALYSIS_AUTOMATON = None
+
+
+def _match_analysis_words(lower_text: str) -> set[str]:
+    """Words to test against the analysis vocabularies.
+
+    With pyahocorasick this is exactly the set of vocabulary words
+    present as whole words; without it, the full token set (membership
+    checks downstream filter identically either way).
+    """
+    if _ANALYSIS_AUTOMATON is None:
+        return set(_WORD_RE.findall(lower_text))
+    last = len(lower_text) - 1
+    return {
+        word
+        for end, word in _ANALYSIS_AUTOMATON.iter(lower_text)
+        if (
+            (start := end - len(word) + 1) == 0
+            or not lower_text[start - 1].isalpha()
+        )
+        and (end == last or not lower_text[end + 1].isalpha())
+    }
+
+
 @app.post("/analyze-message")
 @limiter.limit("60/minute")
 async def analyze_message(request: Request, body: dict):
@@ -330,65 +531,21 @@ async def analyze_message(request: Request, body: dict):
             "urgency": "normal",
         }
 
-        # Check for emotional indicators
-        message_lower = message.lower()
-
-        # Positive indicators
-        positive_words = [
-            "love",
-            "happy",
-            "great",
-            "fantastic",
-            "wonderful",
-            "amazing",
-            "good",
-            "excellent",
-        ]
-        found_positive = [word for word in positive_words if word in message_lower]
-        if found_positive:
-            analysis["emotional_indicators"].extend(
-                [f"positive: {word}" for word in found_positive]
-            )
+        # One matching pass; every keyword test below is a set lookup
+        tokens = _match_analysis_words(message.lower())
 
-        # Negative indicators
-        negative_words = [
-            "sad",
-            "angry",
-            "hate",
-            "terrible",
-            "awful",
-            "bad",
-            "horrible",
-            "frustrated",
+        analysis["emotional_indicators"].extend(
+            f"positive: {word}" for word in POSITIVE_WORDS if word in tokens
+        )
+        analysis["emotional_indicators"].extend(
+            f"negative: {word}" for word in NEGATIVE_WORDS if word in tokens
+        )
+        if tokens & HIGH_URGENCY_WORDS:
+            analysis["urgency"] = "high"
+
+        analysis["topics"] = [
+            topic for topic, words in TOPIC_WORDS.items() if tokens & words
         ]
-        found_negative = [word for word in negative_words if word in message_lower]
-        if found_negative:
-            analysis["emotional_indicators"].extend(
-                [f"negative: {word}" for word in found_negative]
-            )
-            if any(word in message_lower for word in ["hate", "terrible", "awful"]):
-                analysis["urgency"] = "high"
-
-        # Topic detection (simple)
-        topics = []
-        if any(word in message_lower for word in ["work", "job", "career", "office"]):
-            topics.append("work")
-        if any(
-            word in message_lower
-            for word in ["family", "mom", "dad", "sister", "brother"]
-        ):
-            topics.append("family")
-        if any(
-            word in message_lower for word in ["health", "doctor", "medicine", "sick"]
-        ):
-            topics.append("health")
-        if any(
-            word in message_lower
-            for word in ["relationship", "partner", "boyfriend", "girlfriend"]
-        ):
-            topics.append("relationships")
-
-        analysis["topics"] = topics
 
         return analysis
 
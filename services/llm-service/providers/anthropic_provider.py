@@ -22,9 +22,12 @@ class AnthropicProvider(LLMProvider):
     def __init__(self, model: str | None = None):
         self.model = model or DEFAULT_MODEL
         self._client: anthropic.AsyncAnthropic | None = None
+        # The key is fixed for the process lifetime; probe the
+        # environment once instead of on every request.
+        self._available = bool(os.getenv("ANTHROPIC_API_KEY"))
 
     def is_available(self) -> bool:
-        return bool(os.getenv("ANTHROPIC_API_KEY"))
+        return self._available
 
     def _get_client(self) -> anthropic.AsyncAnthropic:
         if self._client is None:
@@ -30,3 +30,6 @@ class LLMProvider(ABC):
     def is_available(self) -> bool:
         """Check whether this provider is configured and usable."""
         ...
+
+    async def aclose(self) -> None:
+        """Release any underlying network resources. Default: nothing to close."""
@@ -22,9 +22,12 @@ class GoogleProvider(LLMProvider):
     def __init__(self, model: str | None = None):
         self.model = model or DEFAULT_MODEL
         self._configured = False
+        # The key is fixed for the process lifetime; probe the
+        # environment once instead of on every request.
+        self._available = bool(os.getenv("GOOGLE_API_KEY"))
 
     def is_available(self) -> bool:
-        return bool(os.getenv("GOOGLE_API_KEY"))
+        return self._available
 
     def _ensure_configured(self):
         if not self._configured:
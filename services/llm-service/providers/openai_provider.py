@@ -4,6 +4,7 @@ import json
 import logging
 import os
 
+import httpx
 import openai
 
 from .base import LLMProvider
@@ -14,6 +15,27 @@ DEFAULT_MODEL = "gpt-4o-mini"
 MAX_TOKENS = 150
 TEMPERATURE = 0.7
 
+# One pooled HTTP client serves every request for the process lifetime:
+# keep-alive connections skip the TCP/TLS handshake on each call, and the
+# pool is sized so concurrent requests don't hit PoolTimeout.
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+HTTP_TIMEOUT = httpx.Timeout(30.0)
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    """Pooled HTTP client, on an aiohttp transport when available.
+
+    httpx's native transport degrades sharply past ~20 in-flight
+    requests; the aiohttp-backed client (openai[aiohttp] extra) keeps
+    concurrent throughput near-linear. Falls back to plain httpx when
+    the extra isn't installed.
+    """
+    try:
+        return openai.DefaultAioHttpClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+    except Exception:
+        logger.info("aiohttp transport unavailable, using httpx for OpenAI client")
+        return httpx.AsyncClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+
 
 class OpenAIProvider(LLMProvider):
     provider_name = "openai"
@@ -21,24 +43,36 @@ class OpenAIProvider(LLMProvider):
     def __init__(self, model: str | None = None):
         self.model = model or DEFAULT_MODEL
         self._client: openai.AsyncOpenAI | None = None
+        # The key is fixed for the process lifetime; probe the
+        # environment once instead of on every request.
+        self._available = bool(os.getenv("OPENAI_API_KEY"))
 
     def is_available(self) -> bool:
-        return bool(os.getenv("OPENAI_API_KEY"))
+        return self._available
 
     def _get_client(self) -> openai.AsyncOpenAI:
         if self._client is None:
-            self._client = openai.AsyncOpenAI()
+            self._client = openai.AsyncOpenAI(http_client=_build_http_client())
         return self._client
 
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
     async def generate_chat_response(
         self, system_prompt: str, user_message: str, context: str = ""
     ) -> str:
         client = self._get_client()
 
+        # The per-emotion system prompt is byte-identical across requests
+        # and always first, so OpenAI's automatic prompt-prefix caching
+        # can hit on it; the per-turn context rides in a user message
+        # instead of mutating the system prefix.
         messages = [{"role": "system", "content": system_prompt}]
         if context:
             messages.append(
-                {"role": "system", "content": f"Recent conversation context:\n{context}"}
+                {"role": "user", "content": f"Recent conversation context:\n{context}"}
             )
         messages.append({"role": "user", "content": user_message})
 
@@ -14,6 +14,18 @@ def _clean_env(monkeypatch):
         monkeypatch.delenv(key, raising=False)
 
 
+@pytest.fixture(autouse=True)
+def _clean_caches():
+    """Reset the module-level response caches between tests."""
+    import main
+
+    main._response_cache.clear()
+    main._semantic_cache.clear()
+    yield
+    main._response_cache.clear()
+    main._semantic_cache.clear()
+
+
 @pytest.fixture
 def mock_llm_provider():
     provider = MagicMock()
@@ -0,0 +1,106 @@
+"""Tests for the exact-match LLM response cache."""
+
+import time
+
+import main
+
+
+class TestResponseCacheHelpers:
+    def test_store_and_hit(self):
+        key = main._response_cache_key("happy", "hello", "")
+        main._store_response(key, "cached text")
+        assert main._cached_response(key) == "cached text"
+
+    def test_miss_on_unknown_key(self):
+        key = main._response_cache_key("happy", "never seen", "")
+        assert main._cached_response(key) is None
+
+    def test_expired_entry_falls_through(self):
+        key = main._response_cache_key("happy", "hello", "")
+        main._store_response(key, "stale text")
+        # Force the entry past its TTL
+        main._response_cache[key] = (time.monotonic() - 1.0, "stale text")
+        assert main._cached_response(key) is None
+        assert key not in main._response_cache
+
+    def test_eviction_at_max(self, monkeypatch):
+        monkeypatch.setattr(main, "_RESPONSE_CACHE_MAX", 3)
+        keys = [
+            main._response_cache_key("happy", f"message {i}", "") for i in range(4)
+        ]
+        for i, key in enumerate(keys):
+            main._store_response(key, f"text {i}")
+        assert len(main._response_cache) == 3
+        # Oldest entry is evicted first
+        assert keys[0] not in main._response_cache
+        assert main._cached_response(keys[3]) == "text 3"
+
+    def test_key_differs_per_triple(self):
+        base = main._response_cache_key("happy", "hello", "")
+        assert main._response_cache_key("sad", "hello", "") != base
+        assert main._response_cache_key("happy", "hi", "") != base
+        assert main._response_cache_key("happy", "hello", "User: hi") != base
+
+
+class TestResponseCacheEndpoint:
+    async def test_exact_hit_skips_provider(
+        self, test_client, service_api_headers, mock_llm_provider
+    ):
+        payload = {"message": "I feel great today", "emotion": "happy"}
+        first = await test_client.post(
+            "/generate-response", json=payload, headers=service_api_headers
+        )
+        second = await test_client.post(
+            "/generate-response", json=payload, headers=service_api_headers
+        )
+        assert first.status_code == second.status_code == 200
+        assert first.json()["response"] == second.json()["response"]
+        assert second.json()["response_type"] == "ai_generated"
+        mock_llm_provider.generate_chat_response.assert_awaited_once()
+
+    async def test_expired_entry_reinvokes_provider(
+        self, test_client, service_api_headers, mock_llm_provider
+    ):
+        payload = {"message": "hello again", "emotion": "neutral"}
+        await test_client.post(
+            "/generate-response", json=payload, headers=service_api_headers
+        )
+        for key, (_, text) in list(main._response_cache.items()):
+            main._response_cache[key] = (time.monotonic() - 1.0, text)
+        main._semantic_cache.clear()
+
+        await test_client.post(
+            "/generate-response", json=payload, headers=service_api_headers
+        )
+        assert mock_llm_provider.generate_chat_response.await_count == 2
+
+    async def test_failed_provider_call_is_not_cached(
+        self, test_client, service_api_headers, mock_llm_provider
+    ):
+        payload = {"message": "hello", "emotion": "neutral"}
+        mock_llm_provider.generate_chat_response.side_effect = RuntimeError("API down")
+        resp = await test_client.post(
+            "/generate-response", json=payload, headers=service_api_headers
+        )
+        assert resp.json()["response_type"] == "mock_response"
+        assert len(main._response_cache) == 0
+        assert len(main._semantic_cache) == 0
+
+        # Once the provider recovers, the same input goes back to it
+        mock_llm_provider.generate_chat_response.side_effect = None
+        resp = await test_client.post(
+            "/generate-response", json=payload, headers=service_api_headers
+        )
+        assert resp.json()["response_type"] == "ai_generated"
+        assert mock_llm_provider.generate_chat_response.await_count == 2
+
+    async def test_mock_path_is_not_cached(
+        self, test_client, service_api_headers, mock_llm_provider
+    ):
+        mock_llm_provider.is_available.return_value = False
+        await test_client.post(
+            "/generate-response",
+            json={"message": "hello", "emotion": "neutral"},
+            headers=service_api_headers,
+        )
+        assert len(main._response_cache) == 0
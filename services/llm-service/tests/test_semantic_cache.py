@@ -0,0 +1,128 @@
+"""Tests for the semantic response cache."""
+
+import math
+
+import numpy as np
+from unittest.mock import AsyncMock
+
+import main
+
+
+def _unit(values):
+    vec = np.asarray(values, dtype=np.float32)
+    return vec / np.linalg.norm(vec)
+
+
+class TestSemanticCacheHelpers:
+    def test_match_above_threshold(self):
+        main._store_semantic("happy", "i feel great", _unit([1.0, 0.0]), "cached")
+        query = _unit([math.cos(0.1), math.sin(0.1)])  # cosine ~0.995
+        assert main._semantic_match("happy", query) == "cached"
+
+    def test_no_match_below_threshold(self):
+        main._store_semantic("happy", "i feel great", _unit([1.0, 0.0]), "cached")
+        # Just under the 0.92 threshold must not hit
+        angle = math.acos(main._SEMANTIC_SIM_THRESHOLD - 0.01)
+        query = _unit([math.cos(angle), math.sin(angle)])
+        assert main._semantic_match("happy", query) is None
+        assert main._semantic_match("happy", _unit([0.0, 1.0])) is None
+
+    def test_emotion_must_match(self):
+        vec = _unit([1.0, 0.0])
+        main._store_semantic("happy", "i feel great", vec, "cached")
+        assert main._semantic_match("sad", vec) is None
+
+    def test_dimension_mismatch_is_skipped(self):
+        main._store_semantic("happy", "i feel great", _unit([1.0, 0.0]), "cached")
+        assert main._semantic_match("happy", _unit([1.0, 0.0, 0.0])) is None
+
+    def test_best_match_wins(self):
+        main._store_semantic("happy", "close", _unit([1.0, 0.1]), "close text")
+        main._store_semantic("happy", "closer", _unit([1.0, 0.0]), "closer text")
+        assert main._semantic_match("happy", _unit([1.0, 0.0])) == "closer text"
+
+    def test_eviction_at_max(self, monkeypatch):
+        monkeypatch.setattr(main, "_SEMANTIC_CACHE_MAX", 2)
+        for i in range(3):
+            main._store_semantic("happy", f"message {i}", _unit([1.0, i]), f"text {i}")
+        assert len(main._semantic_cache) == 2
+
+    async def test_embed_unit_zero_vector(self, mock_embedding_provider):
+        mock_embedding_provider.generate_embedding = AsyncMock(return_value=[0.0] * 4)
+        main.embedding_provider = mock_embedding_provider
+        try:
+            assert await main._embed_unit("anything") is None
+        finally:
+            main.embedding_provider = None
+
+    async def test_embed_unit_provider_failure(self, mock_embedding_provider):
+        mock_embedding_provider.generate_embedding = AsyncMock(
+            side_effect=RuntimeError("embeddings down")
+        )
+        main.embedding_provider = mock_embedding_provider
+        try:
+            assert await main._embed_unit("anything") is None
+        finally:
+            main.embedding_provider = None
+
+
+class TestSemanticCacheEndpoint:
+    async def test_near_duplicate_reuses_response(
+        self, test_client, service_api_headers, mock_llm_provider, mock_embedding_provider
+    ):
+        # Both messages embed to the same vector: exact cache misses on
+        # the second, the semantic layer hits
+        first = await test_client.post(
+            "/generate-response",
+            json={"message": "I feel down", "emotion": "sad"},
+            headers=service_api_headers,
+        )
+        second = await test_client.post(
+            "/generate-response",
+            json={"message": "feeling blue", "emotion": "sad"},
+            headers=service_api_headers,
+        )
+        assert first.json()["response"] == second.json()["response"]
+        assert second.json()["response_type"] == "ai_generated"
+        mock_llm_provider.generate_chat_response.assert_awaited_once()
+
+    async def test_dissimilar_message_reaches_provider(
+        self, test_client, service_api_headers, mock_llm_provider, mock_embedding_provider
+    ):
+        mock_embedding_provider.generate_embedding = AsyncMock(
+            side_effect=[[1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0]]
+        )
+        for message in ("I feel down", "what a lovely morning"):
+            await test_client.post(
+                "/generate-response",
+                json={"message": message, "emotion": "sad"},
+                headers=service_api_headers,
+            )
+        assert mock_llm_provider.generate_chat_response.await_count == 2
+
+    async def test_same_vector_different_emotion_reaches_provider(
+        self, test_client, service_api_headers, mock_llm_provider, mock_embedding_provider
+    ):
+        await test_client.post(
+            "/generate-response",
+            json={"message": "I feel down", "emotion": "sad"},
+            headers=service_api_headers,
+        )
+        await test_client.post(
+            "/generate-response",
+            json={"message": "feeling blue", "emotion": "angry"},
+            headers=service_api_headers,
+        )
+        assert mock_llm_provider.generate_chat_response.await_count == 2
+
+    async def test_unavailable_embeddings_skip_semantic_layer(
+        self, test_client, service_api_headers, mock_llm_provider, mock_embedding_provider
+    ):
+        mock_embedding_provider.is_available.return_value = False
+        await test_client.post(
+            "/generate-response",
+            json={"message": "I feel down", "emotion": "sad"},
+            headers=service_api_headers,
+        )
+        assert len(main._semantic_cache) == 0
+        mock_llm_provider.generate_chat_response.assert_awaited_once()